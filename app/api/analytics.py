@@ -0,0 +1,247 @@
+"""Bounded, non-blocking analytics queue for the API.
+
+Request handlers only ever call :meth:`AnalyticsQueue.capture` /
+:meth:`AnalyticsQueue.capture_exception`, which enqueue and return. A
+background task batches events and hands them to a sink on a worker thread,
+so a slow analytics backend never shows up in API latency. Under pressure
+events are sampled and then dropped rather than blocking the caller.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class AnalyticsEvent:
+    kind: str  # "capture" | "exception"
+    name: str | None = None
+    exception: BaseException | None = None
+    distinct_id: str | None = None
+    session_id: str | None = None
+    properties: dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+
+
+class PosthogSink:
+    """Forwards batches to a PostHog client, restoring per-event identity context."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def send(self, batch: Sequence[AnalyticsEvent]) -> None:
+        from posthog import identify_context, new_context, set_context_session
+
+        for event in batch:
+            with new_context():
+                if event.distinct_id:
+                    identify_context(event.distinct_id)
+                if event.session_id:
+                    set_context_session(event.session_id)
+                if event.kind == "exception":
+                    self.client.capture_exception(event.exception, properties=event.properties)
+                else:
+                    self.client.capture(event=event.name, properties=event.properties)
+
+    def close(self) -> None:
+        self.client.shutdown()
+
+
+class LocalSink:
+    """Offline stand-in: counts events, optionally sleeps to mimic a slow backend
+    and appends events as JSON lines to ``path``."""
+
+    def __init__(self, latency_ms: float = 0.0, path: str | None = None):
+        self.latency = latency_ms / 1000.0
+        self.path = path
+        self.batches = 0
+        self.events = 0
+        self._lock = threading.Lock()
+
+    def send(self, batch: Sequence[AnalyticsEvent]) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.batches += 1
+            self.events += len(batch)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for event in batch:
+                        f.write(json.dumps({
+                            "kind": event.kind,
+                            "name": event.name or type(event.exception).__name__,
+                            "distinct_id": event.distinct_id,
+                            "properties": event.properties,
+                            "created_at": event.created_at,
+                        }, default=str) + "\n")
+
+    def close(self) -> None:
+        pass
+
+
+class AnalyticsQueue:
+    """Bounded in-process queue with a background flusher task.
+
+    * above ``sample_above`` (fraction of ``max_size``) plain captures are
+      kept with probability ``sample_rate``; exceptions are never sampled out
+    * when the queue is full the event is dropped
+    """
+
+    def __init__(
+        self,
+        sink,
+        max_size: int = 10_000,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        sample_above: float = 0.8,
+        sample_rate: float = 0.1,
+    ):
+        self.sink = sink
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_above = sample_above
+        self.sample_rate = sample_rate
+        self._queue: asyncio.Queue[AnalyticsEvent] | None = None
+        self._task: asyncio.Task | None = None
+        self._inflight: asyncio.Future | None = None
+        self._collecting: list[AnalyticsEvent] = []
+        self.enqueued = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+
+    # ---- producer side (hot path) ----
+    def capture(self, event: str, distinct_id=None, session_id=None, properties=None) -> bool:
+        return self._offer(AnalyticsEvent(
+            kind="capture", name=event, distinct_id=distinct_id,
+            session_id=session_id, properties=properties or {},
+        ))
+
+    def capture_exception(self, exception: BaseException, distinct_id=None, session_id=None, properties=None) -> bool:
+        return self._offer(AnalyticsEvent(
+            kind="exception", exception=exception, distinct_id=distinct_id,
+            session_id=session_id, properties=properties or {},
+        ))
+
+    def _offer(self, event: AnalyticsEvent) -> bool:
+        if self._queue is None:
+            # flusher not running (e.g. app used without lifespan): nothing to drain into
+            self.dropped += 1
+            return False
+        depth = self._queue.qsize()
+        if (
+            event.kind == "capture"
+            and depth >= self.sample_above * self.max_size
+            and random.random() >= self.sample_rate
+        ):
+            self.sampled_out += 1
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    # ---- consumer side ----
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = asyncio.create_task(self._run(), name="analytics-flusher")
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop the flusher and send whatever is still queued (bounded by ``timeout``)."""
+
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._inflight is not None:
+            try:
+                await asyncio.wait_for(self._inflight, timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Analytics shutdown: in-flight batch did not finish in time")
+            self._inflight = None
+        # events the flusher had dequeued but not yet sent when cancelled
+        leftover, self._collecting = self._collecting, []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        self._queue = None
+        # same batch_size chunks as the flusher; timeout bounds the whole drain
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        for start in range(0, len(leftover), self.batch_size):
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                await asyncio.wait_for(asyncio.to_thread(self._send, leftover[start:start + self.batch_size]), remaining)
+            except asyncio.TimeoutError:
+                logger.warning(f"Analytics shutdown flush timed out, {len(leftover) - start} events lost")
+                break
+        await asyncio.to_thread(self.sink.close)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = self._collecting = [await queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self._collecting = []
+            # shielded so stop() can cancel the loop without losing an in-flight batch
+            self._inflight = asyncio.ensure_future(asyncio.to_thread(self._send, batch))
+            await asyncio.shield(self._inflight)
+            self._inflight = None
+
+    def _send(self, batch: list[AnalyticsEvent]) -> None:
+        try:
+            self.sink.send(batch)
+        except Exception as e:  # analytics must never take the API down
+            self.failed += len(batch)
+            logger.warning(f"Analytics sink failed for {len(batch)} events: {e}")
+            return
+        self.sent += len(batch)
+        self.batches += 1
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self.max_size,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "failed": self.failed,
+        }
@@ -1,7 +1,27 @@
 from dotenv import load_dotenv
+import asyncio
+import httpx
+import random
 import requests
 import os
 import json
+import weakref
+
+# Retry policy of the async client: transport errors, timeouts, 429 and 5xx
+# are retried with exponential backoff (full jitter, capped), other 4xx fail fast
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+EMBED_BACKOFF_BASE = float(os.getenv("EMBED_BACKOFF_BASE", "0.5"))  # seconds
+EMBED_BACKOFF_MAX = float(os.getenv("EMBED_BACKOFF_MAX", "30"))
+EMBED_TIMEOUT = float(os.getenv("EMBED_TIMEOUT", "120"))
+# pooled keep-alive connections per event loop; at least the indexer's in-flight batches
+EMBED_MAX_CONNECTIONS = int(os.getenv("EMBED_MAX_CONNECTIONS", "8"))
+
+
+class RetryableResponse(Exception):
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}: {response.text[:200]}")
+        self.response = response
+
 
 class infinity_embeddings:
     def __init__(self, model):
@@ -9,30 +29,85 @@ class infinity_embeddings:
         self.model = model
         self.API_KEY = os.getenv("RUNPOD_API_EMBEDDINGS")
         self.url = "https://api.runpod.ai/v2/lhc96ll22wg25g/openai/v1/embeddings"
-    def get_embeddings(self, input):
-        print("HERE")
-        headers = {
+        # httpx connections are bound to the loop that opened them: one client per loop
+        self._clients = weakref.WeakKeyDictionary()
+        self.retries = 0
+    def _headers(self):
+        return {
             'Content-Type': 'application/json',
-            'Authorization': f"Bearer {self.API_KEY}" 
+            'Authorization': f"Bearer {self.API_KEY}"
         }
-
+    def _parse(self, payload_json):
+        emb_blocks = payload_json["data"]
+        total_tokens = payload_json["usage"]["total_tokens"]
+        # the OpenAI format carries each input's position; don't rely on response order
+        emb_blocks = sorted(emb_blocks, key=lambda elem: elem.get("index", 0))
+        return {
+            "embeddings": [elem["embedding"] for elem in emb_blocks],
+            "total_tokens": total_tokens
+        }
+    def get_embeddings(self, input):
         data = {
             'model': self.model,
             'input': input
         }
         try:
-            response = requests.post(self.url, headers=headers, json=data)
-            payload = response.content 
+            response = requests.post(self.url, headers=self._headers(), json=data)
+            payload = response.content
             payload_json = json.loads(payload.decode())
-            emb_blocks = payload_json["data"]
-            total_tokens = payload_json["usage"]["total_tokens"]
-
-            embeddings = [elem["embedding"] for elem in emb_blocks]
-            # print(embeddings)
-            response = {
-                "embeddings": embeddings,
-                "total_tokens": total_tokens
-            }
-            return response 
+            return self._parse(payload_json)
         except Exception as e:
-            print(f"Error in request: {e}")
\ No newline at end of file
+            print(f"Error in request: {e}")
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                headers=self._headers(),
+                timeout=EMBED_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=EMBED_MAX_CONNECTIONS,
+                    max_keepalive_connections=EMBED_MAX_CONNECTIONS,
+                ),
+            )
+            self._clients[loop] = client
+        return client
+
+    def _backoff(self, attempt, error):
+        if isinstance(error, RetryableResponse):
+            retry_after = error.response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), EMBED_BACKOFF_MAX)
+        return random.uniform(0, min(EMBED_BACKOFF_MAX, EMBED_BACKOFF_BASE * 2 ** attempt))
+
+    async def aget_embeddings(self, input):
+        """
+        Async version of get_embeddings on a pooled client. Retries transient failures
+        and raises once EMBED_MAX_RETRIES is exhausted instead of returning None.
+        """
+        data = {
+            'model': self.model,
+            'input': input
+        }
+        client = self._client()
+        for attempt in range(EMBED_MAX_RETRIES + 1):
+            try:
+                response = await client.post(self.url, json=data)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise RetryableResponse(response)
+                response.raise_for_status()
+                return self._parse(response.json())
+            except (httpx.TransportError, RetryableResponse) as e:
+                if attempt == EMBED_MAX_RETRIES:
+                    raise RuntimeError(f"❌ Embedding request failed after {attempt + 1} attempts: {e!r}") from e
+                wait_time = self._backoff(attempt, e)
+                print(f"⚠️ Embedding request failed ({e!r}), retry {attempt + 1}/{EMBED_MAX_RETRIES} in {wait_time:.1f}s")
+                self.retries += 1
+                await asyncio.sleep(wait_time)
+
+    async def aclose(self):
+        """Close the current event loop's pooled client."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
@@ -1,13 +1,24 @@
-from fastapi import FastAPI, HTTPException, Request
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from app.services.retrieval import Retriever
+from app.services.search.filters import SearchFilters
+from app.services.search.profiles import ProfileName
 from app.services.podcasts import get_podcasts_by_category, get_podcast_by_id
+from app.db.session import get_engine, dispose_engine
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
-from posthog import Posthog, new_context, identify_context, set_context_session
+from posthog import Posthog
+from app.api.analytics import AnalyticsQueue, LocalSink, PosthogSink
+from app.services.search import timing
+import asyncio
+import hmac
 import time
 import logging
 import json
+import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,7 +29,42 @@ posthog = Posthog(
   enable_exception_autocapture=True
 )
 
-app = FastAPI(title="Stories Search API", version="1.0")
+def _analytics_sink():
+    # ANALYTICS_SINK=local swaps PostHog for an offline stand-in (load tests)
+    if os.getenv("ANALYTICS_SINK", "posthog").lower() == "local":
+        return LocalSink(
+            latency_ms=float(os.getenv("ANALYTICS_LOCAL_LATENCY_MS", "0")),
+            path=os.getenv("ANALYTICS_LOCAL_PATH"),
+        )
+    return PosthogSink(posthog)
+
+# Request handlers only enqueue; a background task ships batches to the sink
+analytics = AnalyticsQueue(
+    _analytics_sink(),
+    max_size=int(os.getenv("ANALYTICS_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("ANALYTICS_BATCH_SIZE", "100")),
+    flush_interval=float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "1.0")),
+    sample_rate=float(os.getenv("ANALYTICS_SAMPLE_RATE", "0.1")),
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled engine for the server's event loop, reused by every request
+    get_engine()
+    analytics.start()
+    # Build and warm the Retriever in the background so /health answers
+    # right away while /ready stays 503 until search can be served
+    warmup_task = asyncio.create_task(warm_up_retriever())
+    try:
+        yield
+    finally:
+        warmup_task.cancel()
+        if retriever is not None:
+            retriever.close()
+        await dispose_engine()
+        await analytics.stop()
+
+app = FastAPI(title="Stories Search API", version="1.0", lifespan=lifespan)
 
 # Enable frontend access (localhost dev)
 app.add_middleware(
@@ -35,57 +81,97 @@ async def posthog_middleware(request: Request, call_next):
     start_time = time.time()
     user_id = request.headers.get("X-User-ID", request.client.host)
     session_id = request.headers.get("X-POSTHOG-SESSION-ID")
-    
-    with new_context():
-        identify_context(user_id)
-        set_context_session(session_id)
-        try:
-            response = await call_next(request)
-            duration = time.time() - start_time
-            if request.url.path != "/health":
-                posthog.capture(
-                    event="api_request",
-                    properties={
-                        "path": request.url.path,
-                        "method": request.method,
-                        "status_code": response.status_code,
-                        "duration_ms": round(duration * 1000, 2),
-                        "success": True
-                    }
-                )
-            
-            return response
-        except Exception as e:
-            duration = time.time() - start_time
-            
-            posthog.capture_exception(
-                e,
+
+    try:
+        response = await call_next(request)
+        duration = time.time() - start_time
+        if request.url.path not in ("/health", "/ready"):
+            analytics.capture(
+                "api_request",
+                distinct_id=user_id,
+                session_id=session_id,
                 properties={
                     "path": request.url.path,
                     "method": request.method,
-                    "duration_ms": round(duration * 1000, 2)
+                    "status_code": response.status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "success": True
                 }
             )
-            raise
-# ---- Initialize the Retriever (lazy-loaded singleton)
+
+        return response
+    except Exception as e:
+        duration = time.time() - start_time
+
+        analytics.capture_exception(
+            e,
+            distinct_id=user_id,
+            session_id=session_id,
+            properties={
+                "path": request.url.path,
+                "method": request.method,
+                "duration_ms": round(duration * 1000, 2)
+            }
+        )
+        raise
+# Per-stage search timings -> Server-Timing header (histograms at /admin/latency)
+@app.middleware("http")
+async def server_timing_middleware(request: Request, call_next):
+    started = time.perf_counter()
+    timings = timing.begin_request()
+    response = await call_next(request)
+    if timings.stages:
+        timings.add("total", (time.perf_counter() - started) * 1000)
+        response.headers["Server-Timing"] = timings.server_timing()
+    return response
+
+# ---- Initialize the Retriever (built and warmed up at startup)
+
+WARMUP_RETRY_SECONDS = 10
+MAX_BATCH_QUERIES = 64
 
 retriever = None
+retriever_ready = False
+retriever_error = None
 
 def get_retriever():
-    """Lazy load the retriever only when needed."""
+    """Return the Retriever singleton, building it if needed."""
     global retriever
     if retriever is None:
-        logger.info("🔄 Initializing Retriever for the first time (this may take 30-60 seconds)...")
+        logger.info("🔄 Initializing Retriever (this may take 30-60 seconds)...")
         retriever = Retriever()
         logger.info("✅ Retriever initialized successfully!")
     return retriever
 
+def _build_and_warm_retriever():
+    started = time.time()
+    get_retriever().warm_up()
+    logger.info(f"✅ Retriever warmed up in {time.time() - started:.1f}s")
+
+async def warm_up_retriever():
+    """Startup task: load models, warm backends, then flip readiness."""
+    global retriever_ready, retriever_error
+    while True:
+        try:
+            await run_in_threadpool(_build_and_warm_retriever)
+            break
+        except Exception as e:
+            # Backends may still be starting up; keep retrying until they answer
+            retriever_error = str(e)
+            logger.error(f"Retriever warm-up failed, retrying in {WARMUP_RETRY_SECONDS}s: {e}")
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+    retriever_error = None
+    retriever_ready = True
+
 
 # ---- Request/Response Models ----
 class QueryRequest(BaseModel):
     # Core search inputs
     query: str
     top_k: int = 20
+    filters: SearchFilters | None = None
+    # vector search quality: fast | balanced | exhaustive (default SEARCH_PROFILE)
+    profile: ProfileName | None = None
 
     # Data-rich context (optional; populated at route layer from FastAPI Request)
     user_id: str | None = None
@@ -96,6 +182,13 @@ class QueryRequest(BaseModel):
     user_agent: str | None = None
     timestamp_ms: int | None = None
 
+class BatchQueryRequest(BaseModel):
+    queries: list[str] = Field(min_length=1, max_length=MAX_BATCH_QUERIES)
+    top_k: int = 20
+    # applied to every query in the batch
+    filters: SearchFilters | None = None
+    profile: ProfileName | None = None
+
 # ---- Routes ----
 @app.get("/")
 def root():
@@ -105,6 +198,38 @@ def root():
 def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+def ready():
+    """Readiness probe: 503 until the Retriever is loaded and warmed up."""
+    if retriever_ready:
+        return {"status": "ready"}
+    status = "failed" if retriever_error else "warming_up"
+    return JSONResponse(status_code=503, content={"status": status, "error": retriever_error})
+
+# /admin/* exposes pool internals and latency histograms: it requires
+# "Authorization: Bearer $ADMIN_TOKEN" and is disabled (404) when the token is unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Unauthorized", headers={"WWW-Authenticate": "Bearer"})
+
+@app.get("/admin/stats", dependencies=[Depends(require_admin)])
+def admin_stats():
+    """In-process cache, connection pool and analytics queue counters."""
+    stats = {"analytics": analytics.stats()}
+    if retriever is not None:
+        stats.update(retriever.stats())
+    return stats
+
+@app.get("/admin/latency", dependencies=[Depends(require_admin)])
+def admin_latency():
+    """p50/p95/p99 per search stage since process start."""
+    return timing.HISTOGRAMS.summary()
+
 @app.get("/pods/{genre}")
 async def get_podcasts_by_genre(genre: str, page: int = 1, page_size: int = 20):
     """Get podcasts by genre with pagination from PostgreSQL."""
@@ -156,50 +281,116 @@ async def get_episodes(feed_id: str, limit: int = 50, offset: int = 0):
         logger.error(f"Error fetching episodes for podcast {feed_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _enrich_request(request: QueryRequest, req: Request):
+    """Enrich the request model with HTTP context for downstream services/analytics."""
+    request.path = str(req.url.path)
+    request.method = req.method
+    request.session_id = req.headers.get("X-POSTHOG-SESSION-ID")
+    request.user_id = req.headers.get("X-User-ID", req.client.host)
+    request.client_ip = req.client.host if req.client else None
+    request.user_agent = req.headers.get("User-Agent")
+    request.timestamp_ms = int(time.time() * 1000)
+
+def _request_context(request: QueryRequest):
+    return {
+        "path": request.path,
+        "method": request.method,
+        "user_id": request.user_id,
+        "session_id": request.session_id,
+        "client_ip": request.client_ip,
+        "user_agent": request.user_agent,
+        "timestamp_ms": request.timestamp_ms,
+    }
+
+def _capture_search_error(e: Exception, request: QueryRequest, req: Request):
+    logger.error(f"Search error: {e}")
+    # Use enriched request context for error analytics
+    analytics.capture_exception(
+        e,
+        distinct_id=request.user_id,
+        session_id=request.session_id,
+        properties={
+            **_request_context(request),
+            "path": request.path or str(req.url.path),
+            "method": request.method or req.method,
+        },
+    )
+
 @app.post("/search")
-def search(request: QueryRequest, req: Request):
+async def search(request: QueryRequest, req: Request):
     """Perform a semantic search against indexed questions."""
     try:
-        # Enrich the request model with HTTP context for downstream services/analytics
-        request.path = str(req.url.path)
-        request.method = req.method
-        request.session_id = req.headers.get("X-POSTHOG-SESSION-ID")
-        request.user_id = req.headers.get("X-User-ID", req.client.host)
-        request.client_ip = req.client.host if req.client else None
-        request.user_agent = req.headers.get("User-Agent")
-        request.timestamp_ms = int(time.time() * 1000)
-
-        results = get_retriever().hybrid_search(request.query, top_k=request.top_k)
+        _enrich_request(request, req)
+
+        if not retriever_ready:
+            raise HTTPException(status_code=503, detail="Search is warming up, try again shortly")
+        results = await retriever.ahybrid_search(
+            request.query, top_k=request.top_k, filters=request.filters, profile=request.profile)
         return {
             "query": request.query,
-            "context": {
-                "path": request.path,
-                "method": request.method,
-                "user_id": request.user_id,
-                "session_id": request.session_id,
-                "client_ip": request.client_ip,
-                "user_agent": request.user_agent,
-                "timestamp_ms": request.timestamp_ms,
-            },
+            "context": _request_context(request),
             "results": results,
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        _capture_search_error(e, request, req)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/search/stream")
+async def search_stream(request: QueryRequest, req: Request):
+    """
+    Streaming variant of /search (NDJSON, one JSON object per line).
+    Emits each retrieval leg as soon as it completes, usually "keyword" (ES)
+    before "semantic" (Chroma), then a "final" event with the fused ranking.
+    """
+    _enrich_request(request, req)
+    if not retriever_ready:
+        raise HTTPException(status_code=503, detail="Search is warming up, try again shortly")
+
+    async def events():
+        yield _ndjson({"event": "context", "query": request.query, "context": _request_context(request)})
+        try:
+            async for event, results in retriever.astream_hybrid_search(
+                request.query, top_k=request.top_k, filters=request.filters, profile=request.profile):
+                yield _ndjson({"event": event, "results": [r.model_dump() for r in results]})
+        except Exception as e:
+            # headers are already sent, so report the failure in-band
+            _capture_search_error(e, request, req)
+            yield _ndjson({"event": "error", "detail": str(e)})
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/search/batch")
+async def search_batch(request: BatchQueryRequest, req: Request):
+    """
+    Run many searches in one call (offline evaluation, related-questions).
+    Queries are embedded in one forward pass, sent to each Chroma collection
+    as one multi-embedding query and to ES as one _msearch.
+    """
+    if not retriever_ready:
+        raise HTTPException(status_code=503, detail="Search is warming up, try again shortly")
+    try:
+        batches = await retriever.abatch_hybrid_search(
+            request.queries, top_k=request.top_k, filters=request.filters, profile=request.profile)
     except Exception as e:
-        print(e)
-        logger.error(f"Search error: {e}")
-        # Use enriched request context for error analytics
-        posthog.capture_exception(
+        logger.error(f"Batch search error: {e}")
+        analytics.capture_exception(
             e,
-            properties={
-                "path": request.path or str(req.url.path),
-                "method": request.method or req.method,
-                "user_id": request.user_id,
-                "session_id": request.session_id,
-                "client_ip": request.client_ip,
-                "user_agent": request.user_agent,
-                "timestamp_ms": request.timestamp_ms,
-            },
+            distinct_id=req.headers.get("X-User-ID", req.client.host),
+            session_id=req.headers.get("X-POSTHOG-SESSION-ID"),
+            properties={"path": str(req.url.path), "method": req.method, "queries": len(request.queries)},
         )
         raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "results": [
+            {"query": q, "results": results}
+            for q, results in zip(request.queries, batches)
+        ],
+    }
+
+def _ndjson(payload):
+    return json.dumps(payload) + "\n"
 
 
 if __name__ == "__main__":
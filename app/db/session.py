@@ -1,6 +1,8 @@
 # app/db/session.py
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import asyncio
 import os
+import weakref
 from app.db.data_models import *
 from dotenv import load_dotenv
 from app.db.base import Base
@@ -11,9 +13,73 @@ if ENV == "development":
     load_dotenv(".env.development")
 db_url = os.getenv("DATABASE_URL")
 
+# Pool settings (override per deployment through the environment)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 disables
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# pgbouncer in transaction mode can't keep server-side prepared statements
+# across transactions, so asyncpg's statement caches have to be off
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+
+# asyncpg connections are bound to the loop that opened them, so we keep one
+# engine per event loop. Entries go away with their loop.
+_engines = weakref.WeakKeyDictionary()
+_session_factories = weakref.WeakKeyDictionary()
+
+
+def _engine_kwargs():
+    kwargs = {
+        "echo": False,
+        "future": True,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if DB_PGBOUNCER:
+        kwargs["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+        }
+    return kwargs
+
+
+def get_engine():
+    """Return the shared engine for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    engine = _engines.get(loop)
+    if engine is None:
+        engine = create_async_engine(db_url, **_engine_kwargs())
+        _engines[loop] = engine
+        _session_factories[loop] = async_sessionmaker(engine, expire_on_commit=False)
+    return engine
+
 
 def AsyncSessionLocal():
-    """Create a fresh engine and session each time to avoid event loop issues."""
-    engine = create_async_engine(db_url, echo=False, future=True)
-    factory = async_sessionmaker(engine, expire_on_commit=False)
-    return factory()
+    """Open a session on the current event loop's pooled engine."""
+    get_engine()
+    return _session_factories[asyncio.get_running_loop()]()
+
+
+async def dispose_engine():
+    """Close every pooled connection of the current event loop's engine."""
+    loop = asyncio.get_running_loop()
+    engine = _engines.pop(loop, None)
+    _session_factories.pop(loop, None)
+    if engine is not None:
+        await engine.dispose()
+
+
+def run_async(coro):
+    """asyncio.run() for pipeline entry points: disposes the loop's engine before the loop closes."""
+
+    async def _runner():
+        try:
+            return await coro
+        finally:
+            await dispose_engine()
+
+    return asyncio.run(_runner())
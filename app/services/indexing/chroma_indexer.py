@@ -1,6 +1,6 @@
+import asyncio
 import chromadb
 import json
-import uuid
 from datetime import datetime
 from app.api.runpod_serverless import infinity_embeddings
 from app.db.session import AsyncSessionLocal
@@ -11,6 +11,13 @@ from sqlalchemy import select, and_
 from sqlalchemy.orm import selectinload
 from app.services.podcasts import load_all_episode_utterances
 from app.services.podcasts import load_all_question_episodes
+from app.services.indexing.content_ids import content_hash, encode_postings, posting, qa_id, sort_postings, utterance_id
+from app.services.indexing.embedding_cache import EmbeddingCache
+from app.services.indexing.embedding_ledger import EmbeddingLedger, metadata_hash
+from app.services.indexing.embedding_pipeline import run_pipeline
+from app.services.indexing.near_duplicates import NearDuplicateClusters
+from app.services.search.episode_metadata import episode_id_of
+from app.services.search.filters import QA_RANGE_UPPER, filter_attributes
 from tqdm import tqdm
 import os
 from dotenv import load_dotenv
@@ -30,6 +37,21 @@ class ChromaIndexer:
     '''
     # Indexer class attributes
     EMBEDDING_MODEL = 'BAAI/bge-base-en-v1.5'
+    # HNSW graph settings; M and ef_construction only apply when a collection is
+    # created, ef_search is re-applied to existing collections on every run.
+    # Sweep them with `python -m benchmarks.hnsw_sweep`
+    HNSW_M = int(os.getenv("CHROMA_HNSW_M", "16"))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("CHROMA_EF_CONSTRUCTION", "200"))
+    HNSW_EF_SEARCH = int(os.getenv("CHROMA_EF_SEARCH", "10"))
+    # Vector ids are content-addressed (see content_ids.py)
+    ID_SCHEME = "content-v1"
+    # QA pairs whose question + answer texts are at least this similar (MinHash
+    # estimate of shingle Jaccard) share one vector; 0 turns clustering off
+    QA_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("QA_NEAR_DUPLICATE_THRESHOLD", "0.8"))
+    # Reuse vectors from the on-disk embedding cache (embedding_cache.py); 0 always calls Runpod
+    USE_EMBEDDING_CACHE = os.getenv("INDEX_EMBEDDING_CACHE", "1") != "0"
+    # Embedding requests in flight while earlier batches are upserted (embedding_pipeline.py)
+    EMBED_CONCURRENCY = int(os.getenv("INDEX_EMBED_CONCURRENCY", "4"))
     
     def __init__(self):
         chroma_host = os.getenv("CHROMA_HOST")
@@ -50,8 +72,9 @@ class ChromaIndexer:
         self.chroma_coll_config = {
             "hnsw": {
                 "space": "cosine",
-                "ef_construction": 200,
-                "ef_search": 10,
+                "ef_construction": self.HNSW_EF_CONSTRUCTION,
+                "ef_search": self.HNSW_EF_SEARCH,
+                "max_neighbors": self.HNSW_M,
             }
         }
         # collections
@@ -60,6 +83,24 @@ class ChromaIndexer:
         self.qa_collection = None
         self.utterances_collection = None
         self.batch_size = 50
+        # opened on first use by the indexing paths; the API builds this class for search
+        # and must never open it (/opt/stories is mounted read-only there)
+        self._ledger = None
+        self._embedding_cache = None
+
+    @property
+    def ledger(self):
+        """What has been embedded where, so runs never scan the collections (embedding_ledger.py)."""
+        if self._ledger is None:
+            self._ledger = EmbeddingLedger()
+        return self._ledger
+
+    @property
+    def embedding_cache(self):
+        """On-disk vectors by (model, text hash), opened on the first embed; None when disabled."""
+        if self._embedding_cache is None and self.USE_EMBEDDING_CACHE:
+            self._embedding_cache = EmbeddingCache()
+        return self._embedding_cache
     
     def init_chroma_collection(self):
         self.qa_collection = self.chroma_client.get_or_create_collection(
@@ -67,7 +108,8 @@ class ChromaIndexer:
             configuration=self.chroma_coll_config,
             metadata = {
                 "description": "Question-answer exchanges in every podcast episode. Metadata includes timestamps",
-                "created": str(datetime.now())
+                "created": str(datetime.now()),
+                "id_scheme": self.ID_SCHEME,
             }
         )
         self.utterances_collection = self.chroma_client.get_or_create_collection(
@@ -75,9 +117,20 @@ class ChromaIndexer:
             configuration=self.chroma_coll_config,
             metadata = {
                 "description": "Utterances from podcast episodes. Metadata includes speaker labels and timestamps",
-                "created": str(datetime.now())
+                "created": str(datetime.now()),
+                "id_scheme": self.ID_SCHEME,
             }
         )
+        # get_or_create keeps an existing collection's configuration
+        for collection in (self.qa_collection, self.utterances_collection):
+            self.apply_ef_search(collection)
+    def apply_ef_search(self, collection, ef_search=None):
+        """Set the default HNSW ef_search of an existing collection (search-time only, no rebuild)."""
+        ef_search = ef_search or self.HNSW_EF_SEARCH
+        current = (collection.configuration or {}).get("hnsw") or {}
+        if current.get("ef_search") != ef_search:
+            collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+            print(f"🔧 {collection.name}: ef_search {current.get('ef_search')} -> {ef_search}")
     def get_collection(self, name):
         return self.chroma_client.get_collection(name)
     def sanitize_metadata(self, meta: dict):
@@ -105,194 +158,313 @@ class ChromaIndexer:
     
     
     
-    async def embed_batch(self, docs):
+    async def embed_remote(self, docs):
         """
         Call Runpod's Infinity Embeddings Serverless API to embed a batch of documents.
         """
-        res = self.embeddings_generator.get_embeddings(docs)
+        res = await self.embeddings_generator.aget_embeddings(docs)
 
         embeddings = res.get("embeddings")
         if embeddings is None:
             raise RuntimeError("❌ Runpod returned no embeddings field.")
 
         return embeddings
-    def filtered_episodes_to_index(self, all_episodes, qa_collection):
-        existing = qa_collection.get(include=["metadatas"])
-
-        indexed_episode_ids = set(
-            m["id"] for m in existing.get("metadatas", []) if m and "id" in m
-        )
-        episodes_to_process = [
-            ep for ep in all_episodes
-            if ep["id"] not in indexed_episode_ids
-        ]
-        episodes_to_process
-        return episodes_to_process
-
-    async def upsert_qa_collection(self):
-        print("Starting QA indexing...")
 
-        if self.qa_collection is None:
-            self.init_chroma_collection()
-
-        all_episodes = await load_all_question_episodes()
-        print("Loaded", len(all_episodes), "episodes")
-
-        episodes = self.filtered_episodes_to_index(all_episodes, self.qa_collection)
-        print("Episodes remaining to index: ", len(episodes))
-        total_qa = sum(len(ep["question_answers"]) for ep in episodes)
-        print(f"Total question-answer pairs to index: {total_qa}")
+    async def embed_batch(self, docs):
+        """
+        Embed a batch of documents, sending only texts missing from the embedding cache to Runpod.
+        """
+        if self.embedding_cache is None:
+            return await self.embed_remote(docs)
+        return await self.embedding_cache.embed(self.EMBEDDING_MODEL, docs, self.embed_remote)
+    def migrate_to_content_ids(self, collection, prefix):
+        """
+        One-time cleanup of vectors stored under random uuids before ids became
+        content-addressed; they would otherwise sit next to their re-upserted copies.
+        The collection is marked afterwards so later runs skip the id scan.
+        """
+        metadata = dict(collection.metadata or {})
+        if metadata.get("id_scheme") == self.ID_SCHEME:
+            return 0
+        ids = collection.get(include=[])["ids"]
+        legacy = [i for i in ids if not i.startswith(prefix)]
+        for start in range(0, len(legacy), 1000):
+            collection.delete(ids=legacy[start:start + 1000])
+        metadata["id_scheme"] = self.ID_SCHEME
+        collection.modify(metadata=metadata)
+        print(f"🧹 {collection.name}: removed {len(legacy)} uuid-keyed vectors")
+        return len(legacy)
+
+    def sync_ledger(self, collection, page=1000):
+        """
+        Make sure the ledger describes the collection. count() is cheap; only when it
+        disagrees with the ledger (new ledger file, recreated collection, crash between
+        an upsert and its checkpoint) are ids, documents and metadata re-read, in pages.
+        Rows rebuilt this way are attributed to the current embedding model.
+        """
+        expected = collection.count()
+        if expected == self.ledger.count(collection.name):
+            return False
+        documents = []
+        for offset in range(0, expected, page):
+            res = collection.get(include=["documents", "metadatas"], limit=page, offset=offset)
+            for doc_id, doc, meta in zip(res["ids"], res["documents"], res["metadatas"]):
+                documents.append((doc_id, episode_id_of(meta or {}) or None, content_hash(doc), metadata_hash(meta)))
+        rows = self.ledger.replace(collection.name, self.EMBEDDING_MODEL, documents)
+        print(f"📒 {collection.name}: ledger rebuilt from Chroma ({rows} documents)")
+        return True
+
+    def plan_documents(self, collection, docs):
+        """
+        Split docs ({"id", "episode_id", "document", "metadata"}) against the ledger into
+        new or changed ones to embed, metadata-only updates, and ledger ids no longer produced.
+        """
+        known = self.ledger.entries(collection.name)
+        to_embed, to_update = [], []
+        for doc in docs:
+            doc["content_hash"] = content_hash(doc["document"])
+            doc["metadata_hash"] = metadata_hash(doc["metadata"])
+            entry = known.get(doc["id"])
+            if entry is None or entry.content_hash != doc["content_hash"] or entry.model != self.EMBEDDING_MODEL:
+                to_embed.append(doc)
+            elif entry.metadata_hash != doc["metadata_hash"]:
+                to_update.append(doc)
+        stale = sorted(known.keys() - {doc["id"] for doc in docs})
+        return to_embed, to_update, stale
+
+    async def write_documents(self, collection, docs, desc):
+        """Embed and upsert what the ledger doesn't have yet, checkpointing every batch."""
+        self.sync_ledger(collection)
+        to_embed, to_update, stale = self.plan_documents(collection, docs)
+        print(f"{desc}: {len(to_embed)} to embed, {len(to_update)} metadata updates, {len(stale)} removed, "
+              f"{len(docs) - len(to_embed) - len(to_update)} unchanged")
+
+        for start in range(0, len(stale), 1000):
+            chunk = stale[start:start + 1000]
+            collection.delete(ids=chunk)
+            self.ledger.remove(collection.name, chunk)
 
         BATCH_SIZE = 100   # sweet spot for Ollama performance
 
-        batch_ids = []
-        batch_docs = []
-        batch_metas = []
+        async def embed(batch):
+            return await self.embed_batch([doc["document"] for doc in batch])
 
-        for episode in tqdm(episodes, desc="Processing episodes"):
-            episode_meta_raw = {
-                k: v for k, v in episode.items()
-                if k not in ("questions", "question_answers")
-            }
-            episode_meta = self.sanitize_metadata(episode_meta_raw)
+        async def write(batch, embeddings):
+            # the Chroma client is blocking; the thread lets the next embeddings arrive meanwhile
+            await asyncio.to_thread(
+                collection.upsert,
+                ids=[doc["id"] for doc in batch],
+                embeddings=embeddings,
+                documents=[doc["document"] for doc in batch],
+                metadatas=[doc["metadata"] for doc in batch],
+            )
+            # checkpoint only once Chroma has the batch; a crash redoes just the unrecorded ones
+            self.ledger.record_batch(collection.name, self.EMBEDDING_MODEL, [
+                (doc["id"], doc["episode_id"], doc["content_hash"], doc["metadata_hash"]) for doc in batch
+            ])
+
+        batches = [to_embed[start:start + BATCH_SIZE] for start in range(0, len(to_embed), BATCH_SIZE)]
+        with tqdm(total=len(to_embed), desc=desc, unit="doc") as progress:
+            def on_batch(batch_stats, stats):
+                progress.update(batch_stats.size)
+                progress.set_postfix(embed_s=f"{batch_stats.embed_s:.2f}", docs_per_s=f"{stats.documents / stats.wall_s:.0f}")
+            pipeline = await run_pipeline(batches, embed, write, self.EMBED_CONCURRENCY, on_batch)
+        throughput = pipeline.summary()
+        if batches:
+            print(f"⚡ {desc}: {throughput['documents']} docs in {throughput['wall_s']}s "
+                  f"({throughput['docs_per_s']} docs/s, embed p50 {throughput['embed_s_p50']}s / p95 {throughput['embed_s_p95']}s, "
+                  f"{self.EMBED_CONCURRENCY} in flight)")
+        for start in range(0, len(to_update), BATCH_SIZE):
+            batch = to_update[start:start + BATCH_SIZE]
+            collection.update(
+                ids=[doc["id"] for doc in batch],
+                metadatas=[doc["metadata"] for doc in batch],
+            )
+            self.ledger.update_metadata(collection.name, [
+                (doc["id"], doc["episode_id"], doc["metadata_hash"]) for doc in batch
+            ])
+        return {
+            "embedded": len(to_embed),
+            "metadata_updated": len(to_update),
+            "removed": len(stale),
+            "unchanged": len(docs) - len(to_embed) - len(to_update),
+            "throughput": throughput,
+        }
 
+    def dedupe_qa_pairs(self, episodes):
+        """
+        Group every QA occurrence by podcast and content: qa id -> question, answer and
+        the postings [episode_id, start, end, published_at, duration] where it was asked.
+        """
+        groups = {}
+        for episode in episodes:
             questions = episode["questions"]
-            qa_pairs = episode["question_answers"]
-            print(f"In episode {episode['id']}, there are {len(qa_pairs)} qa pairs.")
-            for i, qa in enumerate(qa_pairs):
+            attributes = filter_attributes(
+                episode.get("podcast_id"), episode.get("date_published"), episode.get("duration"))
+            podcast_id = attributes.get("podcast_id")
+            for i, qa in enumerate(episode["question_answers"]):
                 q = qa.get("question", "")
                 a = qa.get("answer", "")
-
                 q_item = questions[i]
-                # print("q_item: ", q_item)
-                start = q_item.get("start")
-                end   = q_item.get("end")
+                group = groups.setdefault(qa_id(q, a, podcast_id), {
+                    "question": q, "answer": a, "podcast_id": podcast_id, "postings": {},
+                })
+                p = posting(episode["id"], q_item.get("start"), q_item.get("end"),
+                            attributes.get("published_at"), attributes.get("duration"))
+                group["postings"][tuple(p)] = p
+        return groups
+
+    def merge_near_duplicates(self, groups):
+        """
+        Fold reworded copies of a QA pair within a podcast into one group (see
+        near_duplicates.py); the leader's id, question and answer are kept, postings are unioned.
+        """
+        if not self.QA_NEAR_DUPLICATE_THRESHOLD:
+            return groups
+        # one vector never spans podcasts, so podcast filters stay exact
+        clusters = {}
+        # the most frequent phrasing leads its cluster; ids break ties so reruns agree
+        order = sorted(groups, key=lambda doc_id: (-len(groups[doc_id]["postings"]), doc_id))
+        merged = {}
+        for doc_id in order:
+            group = groups[doc_id]
+            podcast_clusters = clusters.setdefault(
+                group["podcast_id"], NearDuplicateClusters(self.QA_NEAR_DUPLICATE_THRESHOLD))
+            leader = podcast_clusters.add(doc_id, f"{group['question']}\n{group['answer']}")
+            if leader == doc_id:
+                merged[doc_id] = {**group, "postings": dict(group["postings"]), "variants": 1}
+            else:
+                merged[leader]["postings"].update(group["postings"])
+                merged[leader]["variants"] += 1
+        return merged
+
+    def qa_metadata(self, group):
+        postings = sort_postings(group["postings"].values())
+        episode_id, start, end = postings[0][:3]
+        # Episode display fields are hydrated by the API from Postgres;
+        # question/answer already live in the document
+        metadata = {"episode_id": episode_id}
+        if group.get("podcast_id"):
+            metadata["podcast_id"] = group["podcast_id"]
+        # range filters select on the envelope of all postings (see search/filters.py)
+        for field, index in (("published_at", 3), ("duration", 4)):
+            values = [p[index] for p in postings if p[index] is not None]
+            if values:
+                metadata[field] = min(values)
+                metadata[QA_RANGE_UPPER[field]] = max(values)
+        metadata["start"] = start
+        metadata["end"] = end
+        metadata["occurrences"] = len(postings)
+        if group.get("variants", 1) > 1:
+            metadata["variants"] = group["variants"]
+        if len(postings) > 1:
+            metadata["postings"] = encode_postings(postings)
+        return self.sanitize_metadata(metadata)
 
-                qa_id = str(uuid.uuid4())
-                doc = json.dumps({"question": q, "answer": a})
+    async def upsert_qa_collection(self):
+        print("Starting QA indexing...")
 
-                metadata = dict(episode_meta)
-                metadata["question"] = q
-                metadata["answer"] = a
-                metadata["start"] = float(start) if start is not None else None
-                metadata["end"] = float(end) if end is not None else None
-                metadata = self.sanitize_metadata(metadata)
-
-                batch_ids.append(qa_id)
-                batch_docs.append(doc)
-                batch_metas.append(metadata)
-
-                # 🚀 When batch is full → embed once → upsert once
-                if len(batch_ids) >= BATCH_SIZE:
-                    embeddings = await self.embed_batch(batch_docs)
-                    self.qa_collection.upsert(
-                        ids=batch_ids,
-                        embeddings=embeddings,
-                        documents=batch_docs,
-                        metadatas=batch_metas
-                    )
-                    batch_ids, batch_docs, batch_metas = [], [], []
-
-        # --- Flush last batch ---
-        if batch_ids:
-            embeddings = await self.embed_batch(batch_docs)
-            self.qa_collection.upsert(
-                ids=batch_ids,
-                embeddings=embeddings,
-                documents=batch_docs,
-                metadatas=batch_metas
-            )
+        if self.qa_collection is None:
+            self.init_chroma_collection()
+        self.migrate_to_content_ids(self.qa_collection, "qa-")
+
+        all_episodes = await load_all_question_episodes()
+        print("Loaded", len(all_episodes), "episodes")
+
+        groups = self.dedupe_qa_pairs(all_episodes)
+        total_qa = sum(len(g["postings"]) for g in groups.values())
+        unique = len(groups)
+        print(f"Question-answer pairs: {total_qa} occurrences, {unique} unique ({total_qa - unique} duplicates)")
+        groups = self.merge_near_duplicates(groups)
+        print(f"Near-duplicate clusters: {len(groups)} ({unique - len(groups)} reworded pairs folded in)")
+
+        docs = []
+        for doc_id, group in groups.items():
+            metadata = self.qa_metadata(group)
+            docs.append({
+                "id": doc_id,
+                "episode_id": metadata["episode_id"],
+                "document": json.dumps({"question": group["question"], "answer": group["answer"]}),
+                "metadata": metadata,
+            })
+        # QA pairs no episode contains any more (re-extracted or deleted episodes) are removed;
+        # pairs already embedded only get their postings/attributes updated
+        written = await self.write_documents(self.qa_collection, docs, "Embedding QA pairs")
 
         print("🎉 Finished indexing all QA pairs!")
         print("Total items in collection:", self.qa_collection.count())
+        return {
+            "occurrences": total_qa,
+            "unique": unique,
+            "clusters": len(groups),
+            **written,
+        }
+
+    def group_utterances(self, utterances):
+        """Flat utterance docs (as loaded for ES) -> [{"id": episode_id, "utterances": [...]}]."""
+        episodes = {}
+        for u in utterances:
+            episode_id = episode_id_of(u)
+            episodes.setdefault(episode_id, {"id": episode_id, "utterances": []})["utterances"].append(u)
+        return list(episodes.values())
 
     async def upsert_utterances_collection(self):
         print("Starting Utterances indexing...")
 
-        self.utterances = self.chroma_client.get_collection(
-                name=self.utterances_collection_name)
+        if self.utterances_collection is None:
+            self.init_chroma_collection()
+        self.migrate_to_content_ids(self.utterances_collection, "utt-")
 
-        all_episodes = await load_all_episode_utterances()
-        print("Loaded", len(all_episodes), "episodes")
-        episodes = self.filtered_episodes_to_index(all_episodes, self.utterances_collection)
-        print("Episodes remaining to index: ", len(episodes))
+        episodes = self.group_utterances(await load_all_episode_utterances())
+        print("Loaded", len(episodes), "episodes")
         total_utterances = sum(len(ep["utterances"]) for ep in episodes)
-        print(f"Total utterances to index: {total_utterances}")
+        print(f"Total utterances: {total_utterances}")
         # for every episode, filter out utterances that are less than 10 words
         for ep in episodes:
             ep["utterances"] = [u for u in ep["utterances"] if len(u["text"].split()) >= 10]
         filtered_total_utterances = sum(len(ep["utterances"]) for ep in episodes)
-        print(f"Total utterances to index after filtering short ones: {filtered_total_utterances}")
-        BATCH_SIZE = 100   # sweet spot for Ollama performance
-
-        batch_ids = []
-        batch_docs = []
-        batch_metas = []
+        print(f"Total utterances after filtering short ones: {filtered_total_utterances}")
 
-        for episode in tqdm(episodes, desc="Processing episodes"):
-            episode_meta_raw = {
-                k: v for k, v in episode.items()
-                if k not in ("utterances")
-            }
-            episode_meta = self.sanitize_metadata(episode_meta_raw)
-
-            utterances = episode["utterances"]
-            # qa_pairs = episode["question_answers"]
-            print(f"In episode {episode['id']}, there are {len(utterances)} utterances.")
-            for i, u in enumerate(utterances):
-                # q = u.get("question", "")
-                # a = u.get("answer", "")
-
-                # q_item = questions[i]
-                # print("q_item: ", q_item)
+        docs = []
+        seen_ids = set()
+        for episode in episodes:
+            for u in episode["utterances"]:
                 start = u.get("start")
                 end   = u.get("end")
-                speaker = u.get("speaker")
-
-                u_id = str(uuid.uuid4())
                 doc = u.get("text", "")
 
-                metadata = dict(episode_meta)
-                metadata["speaker"] = speaker
+                u_id = utterance_id(episode["id"], start, doc)
+                if u_id in seen_ids:
+                    # same text at the same timestamp: one vector is enough
+                    continue
+                seen_ids.add(u_id)
+
+                metadata = {"episode_id": episode["id"]}
+                metadata.update({k: u[k] for k in ("podcast_id", "published_at", "duration") if u.get(k) is not None})
+                metadata["speaker"] = u.get("speaker")
                 metadata["start"] = float(start) if start is not None else None
                 metadata["end"] = float(end) if end is not None else None
-                metadata = self.sanitize_metadata(metadata)
-
-                batch_ids.append(u_id)
-                batch_docs.append(doc)
-                batch_metas.append(metadata)
-
-                # 🚀 When batch is full → embed once → upsert once
-                if len(batch_ids) >= BATCH_SIZE:
-                    # for doc in batch_docs:
-                    #     print(doc[:100])
-                    #     print('\n')
-                    embeddings = await self.embed_batch(batch_docs)
-                    self.utterances.upsert(
-                        ids=batch_ids,
-                        embeddings=embeddings,
-                        documents=batch_docs,
-                        metadatas=batch_metas
-                    )
-                    batch_ids, batch_docs, batch_metas = [], [], []
-
-        # --- Flush last batch ---
-        if batch_ids:
-            embeddings = await self.embed_batch(batch_docs)
-            self.utterances_collection.upsert(
-                ids=batch_ids,
-                embeddings=embeddings,
-                documents=batch_docs,
-                metadatas=batch_metas
-            )
+                docs.append({
+                    "id": u_id,
+                    "episode_id": episode["id"],
+                    "document": doc,
+                    "metadata": self.sanitize_metadata(metadata),
+                })
 
-        print("🎉 Finished indexing all QA pairs!")
+        # checkpoints are per batch, so a crashed run resumes mid-episode
+        written = await self.write_documents(self.utterances_collection, docs, "Embedding utterances")
+
+        print("🎉 Finished indexing all utterances!")
         print("Total items in collection:", self.utterances_collection.count())
-        
-        
+        return written
+
+    async def aclose(self):
+        await self.embeddings_generator.aclose()
+
     def delete_collection(self, collection_name):
         try:
             self.chroma_client.delete_collection(collection_name)
+            self.ledger.replace(collection_name, self.EMBEDDING_MODEL, [])
             print(f"Deleted collection: {collection_name}")
         except Exception as e:
             print(f"Error: {e}")
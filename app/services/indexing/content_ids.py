@@ -0,0 +1,72 @@
+"""Deterministic, content-addressed ids for indexed documents.
+
+Ids are derived from what a document *is*, not when it was indexed, so
+re-running an indexing step upserts the same ids instead of appending a
+second copy of the corpus:
+
+* utterances: ``(episode_id, start, sha256(normalized text))``
+* QA pairs: ``sha256(podcast_id + normalized question + answer)``. The same
+  pair asked in many episodes of a podcast is embedded once; each occurrence
+  is kept as a posting ``[episode_id, start, end, published_at, duration]``
+  in the vector's ``postings`` metadata, and the first posting (by episode
+  id, then start) provides ``episode_id`` and start/end, so the choice is
+  stable across runs. Scoping by podcast keeps ``podcast_id`` filters exact
+  (see search/filters.py for dates and durations).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Iterable
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str | None) -> str:
+    """Canonical form used for content hashes: NFKC, case-folded, single spaces."""
+
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE.sub(" ", text.casefold()).strip()
+
+
+def content_hash(*parts: str | None) -> str:
+    normalized = "\n".join(normalize_text(part) for part in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def utterance_id(episode_id: str, start: float | None, text: str) -> str:
+    start_key = f"{float(start):.3f}" if start is not None else ""
+    key = f"{episode_id}|{start_key}|{content_hash(text)}"
+    return "utt-" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def qa_id(question: str, answer: str, podcast_id: str | None = None) -> str:
+    return "qa-" + content_hash(podcast_id or "", question, answer)[:32]
+
+
+def posting(episode_id: str, start: float | None, end: float | None,
+            published_at: int | None = None, duration: int | None = None) -> list:
+    return [
+        episode_id,
+        float(start) if start is not None else None,
+        float(end) if end is not None else None,
+        published_at,
+        duration,
+    ]
+
+
+def sort_postings(postings: Iterable[list]) -> list[list]:
+    return sorted(postings, key=lambda p: (str(p[0]), p[1] if p[1] is not None else -1.0))
+
+
+def encode_postings(postings: Iterable[list]) -> str:
+    """Chroma metadata values must be scalars, so postings travel as compact JSON."""
+
+    return json.dumps(sort_postings(postings), separators=(",", ":"))
+
+
+def decode_postings(value: str | None) -> list[list]:
+    return json.loads(value) if value else []
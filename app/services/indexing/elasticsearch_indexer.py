@@ -2,6 +2,7 @@ from elasticsearch import Elasticsearch
 from elasticsearch import helpers
 from tqdm import tqdm
 from app.services.podcasts import load_all_episode_utterances
+from app.services.indexing.content_ids import utterance_id
 from dotenv import load_dotenv
 import os 
 
@@ -10,16 +11,59 @@ ENV = os.getenv("APP_ENV", "development")  # default to development
 if ENV == "development":
     load_dotenv(".env.development")
 class ESIndexer:
-    def __init__(self):
+    # Settings for the long-lived search client owned by the API's Retriever
+    SEARCH_CONNECTIONS_PER_NODE = int(os.getenv("ES_CONNECTIONS_PER_NODE", "16"))
+    SEARCH_REQUEST_TIMEOUT = float(os.getenv("ES_SEARCH_TIMEOUT", "5"))
+
+    def __init__(self, **client_options):
         ES_HOST = os.getenv("ES_HOST")
         # Increase client-level timeouts and enable retries to avoid premature read timeouts
-        self.es = Elasticsearch(
-            ES_HOST,
-            request_timeout=60,  # seconds
+        options = {
+            "request_timeout": 60,  # seconds
+            "retry_on_timeout": True,
+            "max_retries": 3,
+        }
+        options.update(client_options)
+        self.es = Elasticsearch(ES_HOST, **options)
+
+    @classmethod
+    def for_search(cls):
+        """
+        Client tuned for low-latency queries: one keep-alive connection pool
+        shared by all requests, short timeouts, no sniffing.
+        """
+        return cls(
+            connections_per_node=cls.SEARCH_CONNECTIONS_PER_NODE,
+            request_timeout=cls.SEARCH_REQUEST_TIMEOUT,
             retry_on_timeout=True,
-            max_retries=3,
+            max_retries=1,
+            sniff_on_start=False,
+            sniff_before_requests=False,
+            sniff_on_node_failure=False,
         )
 
+    def pool_stats(self):
+        """Connection reuse counters for every node in the transport's pool."""
+        nodes = []
+        for node in self.es.transport.node_pool.all():
+            pool = getattr(node, "pool", None)
+            opened = getattr(pool, "num_connections", None)
+            requests = getattr(pool, "num_requests", None)
+            # urllib3 pre-fills its queue with None slots; count real sockets only
+            queue = getattr(getattr(pool, "pool", None), "queue", None)
+            idle = sum(1 for conn in list(queue) if conn is not None) if queue is not None else None
+            nodes.append({
+                "node": str(node.base_url),
+                "connections_opened": opened,
+                "requests": requests,
+                "idle_connections": idle,
+                "reuse_ratio": round(1 - opened / requests, 4) if opened is not None and requests else None,
+            })
+        return nodes
+
+    def close(self):
+        self.es.close()
+
     def insert_one_utterance(self, index_name: str, document_id: str, document_body: dict):
         self.es.index(index=index_name, id=document_id, body=document_body)
 
@@ -48,7 +92,21 @@ class ESIndexer:
         except Exception:
             # ignore errors on delete
             pass
-        self.es.indices.create(index="utterances", timeout='30s')
+        # filter fields are keyword/numeric so bool.filter clauses are exact and cacheable
+        mappings = {
+            "properties": {
+                "episode_id": {"type": "keyword"},
+                "podcast_id": {"type": "keyword"},
+                "published_at": {"type": "long"},
+                "duration": {"type": "integer"},
+                "speaker": {"type": "keyword"},
+                "start": {"type": "float"},
+                "end": {"type": "float"},
+                "confidence": {"type": "float"},
+                "text": {"type": "text"},
+            }
+        }
+        self.es.indices.create(index="utterances", mappings=mappings, timeout='30s')
     
     def delete_index(self):
         self.es.indices.delete(index='utterances')
@@ -74,6 +132,8 @@ class ESIndexer:
             for doc in utterances:
                 yield {
                     "_index": index_name,
+                    # same content-addressed id as the Chroma vector, so re-runs overwrite
+                    "_id": utterance_id(doc["episode_id"], doc.get("start"), doc.get("text", "")),
                     "_source": doc,
                 }
 
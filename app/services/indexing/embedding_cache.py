@@ -0,0 +1,108 @@
+"""On-disk cache of indexing embeddings, keyed by ``(model, sha256(text))``.
+
+The key is the exact text, not normalized: embeddings depend on case and
+whitespace. Vectors are stored as float16 and returned as float32; fresh
+ones go through the same rounding, so a rebuild from the cache matches one
+from the API.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+_DEFAULT_PATH = Path("data/embedding_cache.sqlite3")
+_PROD_PATH = Path("/opt/stories/embedding_cache.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_sha256 BLOB NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    -- rowid table: ~1.5 KB rows are too large for WITHOUT ROWID's clustered b-tree
+    PRIMARY KEY (model, text_sha256)
+);
+"""
+
+# keeps each lookup under SQLite's bound-parameter limit
+_LOOKUP_CHUNK = 500
+
+
+def cache_path() -> Path:
+    override = os.getenv("INDEX_EMBEDDING_CACHE_PATH")
+    if override:
+        return Path(override)
+    env = os.getenv("APP_ENV", "development").lower()
+    return _PROD_PATH if env == "production" else _DEFAULT_PATH
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: Path | str | None = None):
+        self.path = Path(path) if path is not None else cache_path()
+        if str(self.path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def lookup(self, model: str, keys: Sequence[bytes]) -> dict[bytes, np.ndarray]:
+        found: dict[bytes, np.ndarray] = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), _LOOKUP_CHUNK):
+            chunk = unique[start:start + _LOOKUP_CHUNK]
+            rows = self._conn.execute(
+                f"SELECT text_sha256, vector FROM embeddings WHERE model = ? "
+                f"AND text_sha256 IN ({','.join('?' * len(chunk))})",
+                (model, *chunk),
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float16)
+        return found
+
+    def store(self, model: str, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float16)
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_sha256, dim, vector) VALUES (?, ?, ?, ?)",
+                [(model, key, vector.shape[0], vector.tobytes()) for key, vector in zip(keys, vectors)],
+            )
+
+    async def embed(self, model: str, texts: Sequence[str], embed_remote) -> np.ndarray:
+        """
+        Vectors for ``texts`` in order; ``embed_remote(missing_texts)`` is awaited
+        once for the texts not cached yet (each distinct text sent once).
+        """
+
+        keys = [text_key(text) for text in texts]
+        found = self.lookup(model, keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        self.hits += len(texts) - sum(1 for key in keys if key in missing)
+        self.misses += len(missing)
+        if missing:
+            fresh = np.asarray(await embed_remote(list(missing.values())), dtype=np.float32)
+            if fresh.ndim != 2 or len(fresh) != len(missing):
+                raise RuntimeError(f"❌ Expected {len(missing)} embeddings, got shape {fresh.shape}")
+            fresh = fresh.astype(np.float16)
+            self.store(model, list(missing), fresh)
+            found.update(zip(missing, fresh))
+        return np.stack([found[key] for key in keys]).astype(np.float32)
+
+    def stats(self) -> dict[str, object]:
+        (rows,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {"path": str(self.path), "vectors": int(rows), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,149 @@
+"""SQLite ledger of the documents embedded into each Chroma collection.
+
+One row per ``(collection, doc_id)`` with its episode, content hash, model
+and metadata hash, committed with a ``batches`` checkpoint after each upsert,
+so step 6 plans writes without scanning Chroma and resumes mid-episode after
+a crash. Chroma stays the source of truth: when ``count()`` disagrees the
+rows are rebuilt from one paged scan (:meth:`EmbeddingLedger.replace`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+_DEFAULT_PATH = Path("data/embedding_ledger.sqlite3")
+_PROD_PATH = Path("/opt/stories/embedding_ledger.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    collection TEXT NOT NULL,
+    model TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    committed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    episode_id TEXT,
+    content_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    metadata_hash TEXT,
+    batch_id INTEGER REFERENCES batches(id),
+    PRIMARY KEY (collection, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS documents_episode ON documents (collection, episode_id);
+"""
+
+
+def ledger_path() -> Path:
+    override = os.getenv("EMBEDDING_LEDGER_PATH")
+    if override:
+        return Path(override)
+    env = os.getenv("APP_ENV", "development").lower()
+    return _PROD_PATH if env == "production" else _DEFAULT_PATH
+
+
+def metadata_hash(metadata: dict | None) -> str:
+    encoded = json.dumps(metadata or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LedgerEntry(NamedTuple):
+    episode_id: str | None
+    content_hash: str
+    model: str
+    metadata_hash: str | None
+
+
+class EmbeddingLedger:
+    def __init__(self, path: Path | str | None = None):
+        self.path = Path(path) if path is not None else ledger_path()
+        if str(self.path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        # one writer (the pipeline); WAL keeps `stats` readable while it commits
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def count(self, collection: str) -> int:
+        row = self._conn.execute("SELECT COUNT(*) FROM documents WHERE collection = ?", (collection,)).fetchone()
+        return int(row[0])
+
+    def entries(self, collection: str) -> dict[str, LedgerEntry]:
+        rows = self._conn.execute(
+            "SELECT doc_id, episode_id, content_hash, model, metadata_hash FROM documents WHERE collection = ?",
+            (collection,),
+        )
+        return {doc_id: LedgerEntry(*rest) for doc_id, *rest in rows}
+
+    def _insert_batch(self, collection: str, model: str, documents: list) -> int:
+        batch_id = self._conn.execute(
+            "INSERT INTO batches (collection, model, size, committed_at) VALUES (?, ?, ?, ?)",
+            (collection, model, len(documents), time.time()),
+        ).lastrowid
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO documents "
+            "(collection, doc_id, episode_id, content_hash, model, metadata_hash, batch_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(collection, doc_id, episode_id, content, model, meta, batch_id)
+             for doc_id, episode_id, content, meta in documents],
+        )
+        return batch_id
+
+    def record_batch(self, collection: str, model: str,
+                     documents: Iterable[tuple[str, str | None, str, str | None]]) -> int:
+        """Checkpoint one upserted batch of ``(doc_id, episode_id, content_hash, metadata_hash)``."""
+
+        with self._conn:
+            return self._insert_batch(collection, model, list(documents))
+
+    def update_metadata(self, collection: str, documents: Iterable[tuple[str, str | None, str]]) -> None:
+        """Record metadata-only updates of ``(doc_id, episode_id, metadata_hash)``."""
+
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE documents SET episode_id = ?, metadata_hash = ? WHERE collection = ? AND doc_id = ?",
+                [(episode_id, meta, collection, doc_id) for doc_id, episode_id, meta in documents],
+            )
+
+    def remove(self, collection: str, doc_ids: Iterable[str]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM documents WHERE collection = ? AND doc_id = ?",
+                [(collection, doc_id) for doc_id in doc_ids],
+            )
+
+    def replace(self, collection: str, model: str,
+                documents: Iterable[tuple[str, str | None, str, str | None]]) -> int:
+        """Rebuild a collection's rows from what Chroma actually holds."""
+
+        with self._conn:
+            self._conn.execute("DELETE FROM documents WHERE collection = ?", (collection,))
+            self._conn.execute("DELETE FROM batches WHERE collection = ?", (collection,))
+            self._insert_batch(collection, model, list(documents))
+        return self.count(collection)
+
+    def stats(self, collection: str) -> dict[str, object]:
+        batches, last = self._conn.execute(
+            "SELECT COUNT(*), MAX(committed_at) FROM batches WHERE collection = ?", (collection,),
+        ).fetchone()
+        episodes = self._conn.execute(
+            "SELECT COUNT(DISTINCT episode_id) FROM documents WHERE collection = ?", (collection,),
+        ).fetchone()[0]
+        return {
+            "documents": self.count(collection),
+            "episodes": int(episodes),
+            "batches": int(batches),
+            "last_batch_at": last,
+        }
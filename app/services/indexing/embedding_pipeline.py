@@ -0,0 +1,150 @@
+"""Overlapped embed → write pipeline for the indexing steps.
+
+The indexer used to alternate strictly: embed a batch, upsert it, embed the
+next one. The Runpod endpoint saw one request at a time and Chroma idled
+while it ran. Here ``concurrency`` embedder tasks pull batches from a shared
+iterator and hand the vectors to a single writer through a queue of the same
+size. That keeps ``concurrency`` embedding requests in flight while the
+previous batches are upserted. When the writer falls behind, the queue fills
+and embedders block on ``put``, so at most ``2 * concurrency`` batches are
+held in memory (backpressure). One writer keeps Chroma writes and ledger
+checkpoints sequential. When an embedding request fails for good, the other
+embedders are cancelled, the writer drains the batches that already have
+vectors, and the error is re-raised; a failing write stops everything and
+is re-raised, also once all batches are embedded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, NamedTuple, Sequence
+
+
+class BatchStats(NamedTuple):
+    index: int
+    size: int
+    embed_s: float
+    # time between the vectors arriving and the writer picking them up
+    queued_s: float
+    write_s: float
+
+    @property
+    def docs_per_s(self) -> float:
+        return self.size / self.embed_s if self.embed_s > 0 else 0.0
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class PipelineStats:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.batches: list[BatchStats] = []
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+
+    def add(self, batch: BatchStats) -> None:
+        self.batches.append(batch)
+
+    @property
+    def documents(self) -> int:
+        return sum(b.size for b in self.batches)
+
+    @property
+    def wall_s(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self) -> dict[str, object]:
+        embed = [b.embed_s for b in self.batches]
+        write = [b.write_s for b in self.batches]
+        wall_s = self.wall_s
+        return {
+            "concurrency": self.concurrency,
+            "batches": len(self.batches),
+            "documents": self.documents,
+            "wall_s": round(wall_s, 3),
+            "docs_per_s": round(self.documents / wall_s, 1) if wall_s > 0 else 0.0,
+            "batch_docs_per_s_p50": round(statistics.median(b.docs_per_s for b in self.batches), 1) if self.batches else 0.0,
+            "embed_s_p50": round(_percentile(embed, 0.5), 3),
+            "embed_s_p95": round(_percentile(embed, 0.95), 3),
+            "embed_s_max": round(max(embed, default=0.0), 3),
+            "write_s_p50": round(_percentile(write, 0.5), 3),
+            "write_s_total": round(sum(write), 3),
+            "queued_s_total": round(sum(b.queued_s for b in self.batches), 3),
+        }
+
+
+async def run_pipeline(
+    batches: Sequence[list],
+    embed: Callable[[list], Awaitable[object]],
+    write: Callable[[list, object], Awaitable[None]],
+    concurrency: int = 4,
+    on_batch: Callable[[BatchStats, PipelineStats], None] | None = None,
+) -> PipelineStats:
+    """Embed ``batches`` with up to ``concurrency`` requests in flight and write each result."""
+
+    concurrency = max(1, concurrency)
+    stats = PipelineStats(concurrency)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    pending = iter(enumerate(batches))
+
+    async def embedder():
+        for index, batch in pending:
+            started = time.perf_counter()
+            embeddings = await embed(batch)
+            await queue.put((index, batch, embeddings, started, time.perf_counter()))
+
+    async def writer():
+        while (item := await queue.get()) is not None:
+            index, batch, embeddings, started, embedded = item
+            write_started = time.perf_counter()
+            await write(batch, embeddings)
+            batch_stats = BatchStats(
+                index, len(batch), embedded - started, write_started - embedded, time.perf_counter() - write_started,
+            )
+            stats.add(batch_stats)
+            if on_batch is not None:
+                on_batch(batch_stats, stats)
+
+    async def finish_writer():
+        # a writer that failed with the queue full never takes the sentinel: wait on both
+        put = asyncio.ensure_future(queue.put(None))
+        try:
+            await asyncio.wait({put, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            put.cancel()
+        await writer_task
+
+    writer_task = asyncio.create_task(writer())
+    embedders = {asyncio.create_task(embedder()) for _ in range(min(concurrency, len(batches)) or 1)}
+    try:
+        running = set(embedders)
+        while running:
+            done, _ = await asyncio.wait(running | {writer_task}, return_when=asyncio.FIRST_COMPLETED)
+            # the writer only stops before the sentinel when it failed
+            for task in done:
+                task.result()
+            running -= done
+    except Exception:
+        for task in embedders:
+            task.cancel()
+        await asyncio.gather(*embedders, return_exceptions=True)
+        if not writer_task.done():
+            # write what was already embedded, so Chroma and the ledger agree
+            await finish_writer()
+        raise
+    except BaseException:
+        for task in (*embedders, writer_task):
+            task.cancel()
+        raise
+    else:
+        await finish_writer()
+    finally:
+        stats.finished = time.perf_counter()
+    return stats
@@ -0,0 +1,123 @@
+"""Streaming near-duplicate clustering with MinHash LSH.
+
+Used before embedding QA pairs: trivially reworded copies of the same
+exchange ("what's your morning routine" / "what is your morning routine
+like", same answer) collapse into one cluster, and only the cluster's
+leader is embedded and stored.
+
+Each text becomes a set of character shingles of its normalized form
+(punctuation dropped, so "what's"/"whats" only differ by a shingle or
+two), summarised by a ``num_perm``-value MinHash signature. Signatures
+are split into ``bands`` of ``rows``; two texts that agree on every row of
+any band are candidates, and a candidate joins a cluster only if the
+signatures' estimated Jaccard similarity with the leader reaches
+``threshold``. Items are processed in one pass: the first item of a
+cluster is its leader, and only leaders are kept in the band buckets.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Hashable, Iterable
+
+import numpy as np
+
+from app.services.indexing.content_ids import normalize_text
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+def shingles(text: str, size: int = 5) -> set[str]:
+    text = _NON_WORD.sub("", normalize_text(text))
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def lsh_bands(threshold: float, num_perm: int) -> tuple[int, int]:
+    """(bands, rows) whose candidate curve rises below ``threshold``.
+
+    Candidates are verified against the signature afterwards, so the bands
+    are chosen to miss few true pairs: the most rows per band whose 50%
+    point ``(1/bands)^(1/rows)`` still sits 0.05 below the threshold (at
+    0.8 and 128 permutations: 16 x 8, which surfaces ~95% of pairs at
+    Jaccard 0.8 and >99% at 0.85).
+    """
+
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1.0 / bands) ** (1.0 / rows) <= threshold - 0.05:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles(text, self.shingle_size)), dtype=np.uint64,
+        )
+        # universal hashing (a*x + b) mod p, truncated to 32 bits; uint64 overflow wraps
+        permuted = (hashes[:, None] * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateClusters:
+    """Leader clustering over a stream of ``(key, text)`` items."""
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 5):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        self._buckets: list[dict[bytes, list[Hashable]]] = [{} for _ in range(self.bands)]
+        self._signatures: dict[Hashable, np.ndarray] = {}
+        self.leader_of: dict[Hashable, Hashable] = {}
+        self.candidates_checked = 0
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, key: Hashable, text: str) -> Hashable:
+        """Assign ``key`` to a cluster; returns the cluster leader's key."""
+
+        signature = self.hasher.signature(text)
+        band_keys = self._band_keys(signature)
+        candidates = list(dict.fromkeys(
+            leader for band, band_key in zip(self._buckets, band_keys) for leader in band.get(band_key, ())
+        ))
+        best = None
+        if candidates:
+            self.candidates_checked += len(candidates)
+            scores = (np.stack([self._signatures[c] for c in candidates]) == signature).mean(axis=1)
+            if scores.max() >= self.threshold:
+                best = candidates[int(scores.argmax())]
+        if best is None:
+            best = key
+            self._signatures[key] = signature
+            for band, band_key in zip(self._buckets, band_keys):
+                band.setdefault(band_key, []).append(key)
+        self.leader_of[key] = best
+        return best
+
+    def add_all(self, items: Iterable[tuple[Hashable, str]]) -> dict[Hashable, Hashable]:
+        for key, text in items:
+            self.add(key, text)
+        return self.leader_of
+
+    @property
+    def clusters(self) -> int:
+        return len(self._signatures)
@@ -20,6 +20,7 @@ from app.db.data_models.transcript import Transcript
 from app.db.data_models.transcript_chapter import TranscriptChapter
 from app.db.data_models.transcript_utterance import TranscriptUtterance
 from app.db.data_models.transcript_word import TranscriptWord
+from app.services.search.filters import filter_attributes
 
 # sqlalchemy 
 from sqlalchemy import select, func, and_, text, or_
@@ -343,6 +344,7 @@ async def load_all_question_episodes():
                     episode, author, podcast_title = row
                     episodes.append({
                         "id": episode.id,
+                        "podcast_id": episode.podcast_id,
                         "author": author,
                         "title": episode.title,
                         "description": episode.description,
@@ -360,8 +362,7 @@ async def load_all_episode_utterances():
         async with AsyncSessionLocal() as session:
             async with session.begin():
                 stmt = (
-                    select(Episode, Podcast.author, Podcast.title)
-                    .join(Episode.podcast)
+                    select(Episode)
                     .join(Episode.transcript)
                     .options(
                         # load transcript + nested utterances
@@ -373,21 +374,14 @@ async def load_all_episode_utterances():
                 result = await session.execute(stmt)
                 rows = result.all()
                 utterances = []
-                for row in rows:
-                    episode, author, podcast_title = row
+                for (episode,) in rows:
                     if episode.transcript and episode.transcript.utterances:
                         for u in episode.transcript.utterances:
+                            # episode display fields are hydrated by the API, not indexed;
+                            # only the filterable attributes travel with each document
                             utterances.append({
-                                "id": episode.id,
-                                "author": author,
-                                "title": episode.title,
-                                "description": episode.description,
-                                "podcast_url": episode.podcast_url,
-                                "podcast_title": podcast_title,
-                                "episode_image": episode.episode_image,
-                                "enclosure_url": episode.enclosure_url,
-                                "duration": episode.duration,
-                                "date_published": episode.date_published,
+                                "episode_id": episode.id,
+                                **filter_attributes(episode.podcast_id, episode.date_published, episode.duration),
                                 "start": u.start,
                                 "end": u.end,
                                 "confidence": u.confidence,
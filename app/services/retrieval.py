@@ -1,9 +1,24 @@
 from app.services.indexing.chroma_indexer import ChromaIndexer
-from FlagEmbedding import FlagModel
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from app.services.indexing.content_ids import decode_postings
 from app.services.indexing.elasticsearch_indexer import ESIndexer
+from app.services.search.embedding_cache import EmbeddingCache
+from app.services.search.episode_metadata import EpisodeMetadataCache, episode_id_of
+from app.services.search.filters import SearchFilters
+from app.services.search.profiles import PROFILES, SearchProfile, get_profile, truncate_results
+from app.services.search.index_generation import GenerationWatcher
+from app.services.search.micro_batch import MicroBatchEncoder
+from app.services.search.result_cache import SearchResultCache
+from app.services.search.timing import stage, timed
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
+import json
+import contextvars
+import functools
+import numpy as np
+import os
 
 class SearchResult(BaseModel):
     id: str
@@ -24,6 +39,11 @@ class SearchResult(BaseModel):
     answer: Optional[str] = None
     utterance: Optional[str] = None
     source: Optional[str] = None
+    # every (episode_id, start, end) where a deduplicated QA pair occurs, when more than one
+    postings: Optional[List[dict]] = None
+
+# query result of a collection the filters rule out
+_NO_RESULTS = {"ids": [], "distances": [], "metadatas": [], "documents": []}
 
 class Retriever:
     """
@@ -31,60 +51,297 @@ class Retriever:
     Uses ChromaDB for vector search and FlagEmbedding for query embeddings.
     """
     EMBEDDING_MODEL = 'BAAI/bge-base-en-v1.5'
-    def __init__(self):
-        print("🔄 Loading FlagModel embedding model...")
-        self.query_emb_model = FlagModel(
-            self.EMBEDDING_MODEL, 
-            query_instruction_for_retrieval="Represent this sentence for searching relevant passages:",
-            use_fp16=False
+    # Max number of blocking calls (encode, Chroma/ES HTTP) in flight per process
+    MAX_WORKERS = int(os.getenv("RETRIEVER_MAX_WORKERS", "8"))
+    # Query embedding cache (repeated queries skip the model entirely)
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+    EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+    EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")
+    # Fused hybrid_search results, invalidated whenever the indexes are rebuilt
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+    RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "600"))
+    # Coalesce concurrent query encodes into one forward pass
+    MICRO_BATCHING = os.getenv("EMBED_MICRO_BATCHING", "true").lower() in ("1", "true", "yes")
+    MICRO_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "3"))
+    MICRO_BATCH_MAX = int(os.getenv("EMBED_MAX_BATCH", "16"))
+    # "torch" (FlagEmbedding, fp32) or "onnx" (onnxruntime int8, see search/onnx_encoder.py)
+    QUERY_ENCODER_BACKEND = os.getenv("QUERY_ENCODER_BACKEND", "torch").lower()
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/bge-base-en-v1.5-int8")
+    ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+    # "chroma" (remote server) or "local" (in-process HNSW snapshot, see search/local_index.py)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    # "hnsw" or "binary" (1-bit Hamming candidates + float16 re-rank) for the other collections
+    LOCAL_INDEX_MODE = os.getenv("LOCAL_INDEX_MODE", "hnsw").lower()
+    LOCAL_INDEX_EF = int(os.getenv("LOCAL_INDEX_EF", "64"))
+    LOCAL_BINARY_OVERSAMPLE = int(os.getenv("LOCAL_BINARY_OVERSAMPLE", "10"))
+    # Collections small enough to search exactly (brute force, full recall) in local mode
+    LOCAL_EXACT_COLLECTIONS = tuple(
+        name.strip() for name in os.getenv("LOCAL_EXACT_COLLECTIONS", "episode_qa_pairs").split(",") if name.strip()
+    )
+    # "float32" (in RAM) or "float16" (mmapped) are exact; "int8" is an approximate int8 scan + float16 re-rank
+    LOCAL_EXACT_DTYPE = os.getenv("LOCAL_EXACT_DTYPE", "float32")
+    # Episode display fields are joined in from Postgres, not stored per vector
+    EPISODE_METADATA_MAX_AGE = float(os.getenv("EPISODE_METADATA_MAX_AGE", "600"))
+    WARMUP_QUERIES = ("funny story", "working at Meta", "good writing tips")
+    def __init__(self, query_encoder=None, chroma_indexer=None, es_indexer=None, episode_loader=None):
+        """
+        The optional arguments replace the real backends (e.g. with in-process
+        fakes for offline load tests); by default everything is built from env.
+        ``episode_loader`` returns the episode metadata table (Postgres by default).
+        """
+        self.query_emb_model = query_encoder if query_encoder is not None else self._load_query_encoder()
+        # backend is part of the cache key: onnx int8 vectors differ slightly from torch fp32
+        self.encoder_name = f"{self.EMBEDDING_MODEL}:{self.QUERY_ENCODER_BACKEND}"
+        self.embedding_cache = EmbeddingCache(
+            max_entries=self.EMBEDDING_CACHE_SIZE,
+            ttl_seconds=self.EMBEDDING_CACHE_TTL,
+            dtype=self.EMBEDDING_CACHE_DTYPE,
+        )
+        self.batch_encoder = None
+        if self.MICRO_BATCHING:
+            self.batch_encoder = MicroBatchEncoder(
+                self.query_emb_model.encode,
+                window_ms=self.MICRO_BATCH_WINDOW_MS,
+                max_batch=self.MICRO_BATCH_MAX,
+            )
+        self.index_generation = GenerationWatcher()
+        self.result_cache = SearchResultCache(
+            max_entries=self.RESULT_CACHE_SIZE,
+            ttl_seconds=self.RESULT_CACHE_TTL,
+        )
+        self.episodes = EpisodeMetadataCache(
+            loader=episode_loader,
+            generation=lambda: self.index_generation.generation,
+            max_age=self.EPISODE_METADATA_MAX_AGE,
         )
-        print("✅ FlagModel loaded!")
         
-        print("🔄 Initializing ChromaDB client...")
-        self.chroma_client = ChromaIndexer()
-        print("✅ ChromaDB client initialized!")
+        self.chroma_client = None
+        if chroma_indexer is not None or self.VECTOR_BACKEND == "chroma":
+            print("🔄 Initializing ChromaDB client...")
+            self.chroma_client = chroma_indexer if chroma_indexer is not None else ChromaIndexer()
+            print("✅ ChromaDB client initialized!")
+        elif self.VECTOR_BACKEND != "local":
+            raise ValueError(f"Unknown VECTOR_BACKEND '{self.VECTOR_BACKEND}'")
         
         print("🔄 Getting QA collection...")
-        self.qa_collection = self.chroma_client.get_collection(name="episode_qa_pairs")
+        self.qa_collection = self._open_collection("episode_qa_pairs")
         print("✅ QA collection loaded!")
         
         print("🔄 Getting utterances collection...")
-        self.utterances_collection = self.chroma_client.get_collection(name="utterances")
+        self.utterances_collection = self._open_collection("utterances")
         print("✅ Utterances collection loaded!")
-    def chroma_search(self, query_text, top_k=10, threshold=None):
+
+        # One long-lived ES client so keyword queries reuse pooled connections
+        self.es_indexer = es_indexer if es_indexer is not None else ESIndexer.for_search()
+
+        # Bounded pool used by the async search path so that the blocking
+        # clients never run on the event loop thread
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.MAX_WORKERS,
+            thread_name_prefix="retriever",
+        )
+    def _open_collection(self, name):
+        if self.chroma_client is not None:
+            return self.chroma_client.get_collection(name=name)
+        from app.services.search.local_index import LocalVectorIndex, local_index_dir
+
+        return LocalVectorIndex(
+            local_index_dir() / name,
+            ef=self.LOCAL_INDEX_EF,
+            generation=lambda: self.index_generation.generation,
+            mode="exact" if name in self.LOCAL_EXACT_COLLECTIONS else self.LOCAL_INDEX_MODE,
+            dtype=self.LOCAL_EXACT_DTYPE,
+            oversample=self.LOCAL_BINARY_OVERSAMPLE,
+        )
+    def _load_query_encoder(self):
+        if self.QUERY_ENCODER_BACKEND == "onnx":
+            from app.services.search.onnx_encoder import OnnxQueryEncoder
+
+            print(f"🔄 Loading ONNX query encoder from {self.ONNX_MODEL_DIR}...")
+            encoder = OnnxQueryEncoder(self.ONNX_MODEL_DIR, intra_op_threads=self.ONNX_INTRA_OP_THREADS)
+            print("✅ ONNX query encoder loaded!")
+            return encoder
+        if self.QUERY_ENCODER_BACKEND != "torch":
+            raise ValueError(f"Unknown QUERY_ENCODER_BACKEND '{self.QUERY_ENCODER_BACKEND}'")
+
+        from FlagEmbedding import FlagModel
+
+        print("🔄 Loading FlagModel embedding model...")
+        encoder = FlagModel(
+            self.EMBEDDING_MODEL, 
+            query_instruction_for_retrieval="Represent this sentence for searching relevant passages:",
+            use_fp16=False
+        )
+        print("✅ FlagModel loaded!")
+        return encoder
+    def warm_up(self):
+        """
+        Run a few encodes and one query per backend so torch thread pools,
+        Chroma and ES connections are hot before real traffic arrives.
+        """
+        embedding = None
+        for q in self.WARMUP_QUERIES:
+            embedding = self.query_emb_model.encode(q)
+        # batched shapes used by the micro-batcher
+        self.query_emb_model.encode(list(self.WARMUP_QUERIES))
+        if self.chroma_client is not None:
+            self.chroma_client.chroma_client.heartbeat()
+        self.qa_collection.query(query_embeddings=embedding, n_results=1)
+        self.utterances_collection.query(query_embeddings=embedding, n_results=1)
+        self.es_indexer.assert_connection()
+        print(f"✅ Loaded metadata for {self.episodes.refresh()} episodes")
+    def close(self):
+        if self.batch_encoder is not None:
+            self.batch_encoder.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.es_indexer.close()
+    def stats(self):
+        return {
+            "embedding_cache": self.embedding_cache.stats(),
+            "result_cache": self.result_cache.stats(),
+            "episode_metadata": self.episodes.stats(),
+            "search_profiles": {name: profile._asdict() for name, profile in PROFILES.items()},
+            "local_index": None if self.chroma_client is not None else {
+                "qa": self.qa_collection.stats(),
+                "utterances": self.utterances_collection.stats(),
+            },
+            "micro_batching": self.batch_encoder.stats() if self.batch_encoder else None,
+            "elasticsearch_pool": self.es_indexer.pool_stats(),
+        }
+    async def _run_blocking(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # copy the context so per-request stage timings follow the call into the pool
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(ctx.run, fn, *args, **kwargs))
+    @staticmethod
+    def _cache_scope(filters: Optional[SearchFilters], profile: Optional[str]):
+        """Everything besides query/top_k that changes the results, for the result-cache key."""
+        scope = filters.cache_key() if filters is not None else None
+        profile = get_profile(profile)
+        if not profile.is_default:
+            scope = {**(scope or {}), "profile": profile.name}
+        return scope
+    def _query_vectors(self, collection, source, embeddings, top_k, filters=None, profile=None):
+        kwargs = {}
+        if filters is not None:
+            if not filters.searches(source):
+                return _NO_RESULTS
+            kwargs["where"] = filters.chroma_where(source)
+        results = self._query_profile(collection, embeddings, top_k, profile, **kwargs)
+        if filters is not None and source == "qa":
+            # QA vectors match on the range envelope of their postings; keep the postings inside it
+            results = filters.narrow_results(results)
+        return results
+    def _query_profile(self, collection, embeddings, top_k, profile=None, **kwargs):
+        profile: SearchProfile = get_profile(profile)
+        if profile.is_default:
+            return collection.query(query_embeddings=embeddings, n_results=top_k, **kwargs)
+        if self.chroma_client is None:
+            return collection.query(
+                query_embeddings=embeddings, n_results=top_k,
+                ef=profile.ef_search, oversample=profile.oversample, **kwargs)
+        # Chroma has no per-query ef_search, but its HNSW explores max(ef_search, n_results):
+        # profiles act through the candidate count (a floor, scaled down by depth for fast)
+        candidates = profile.candidates(top_k)
+        results = collection.query(query_embeddings=embeddings, n_results=candidates, **kwargs)
+        return truncate_results(results, top_k) if candidates > top_k else results
+    @timed("chroma_qa")
+    def _query_qa(self, embeddings, top_k, filters: Optional[SearchFilters] = None, profile: Optional[str] = None):
+        return self._query_vectors(self.qa_collection, "qa", embeddings, top_k, filters, profile)
+    @timed("chroma_utterances")
+    def _query_utterances(self, embeddings, top_k, filters: Optional[SearchFilters] = None, profile: Optional[str] = None):
+        return self._query_vectors(self.utterances_collection, "utterance", embeddings, top_k, filters, profile)
+    def _encode_query(self, query_text):
+        if self.batch_encoder is not None:
+            return self.batch_encoder.encode(query_text)
+        return self.query_emb_model.encode(query_text)
+    @timed("embed")
+    def embed_query(self, query_text):
+        key = EmbeddingCache.key(self.encoder_name, query_text)
+        return self.embedding_cache.get_or_compute(key, lambda: self._encode_query(query_text))
+    @timed("embed")
+    def embed_queries(self, query_texts):
+        """
+        Embed many queries at once: cache hits are reused and all misses go
+        through a single encode call (one forward pass).
+        """
+        vectors = [None] * len(query_texts)
+        missing = {}
+        for i, q in enumerate(query_texts):
+            key = EmbeddingCache.key(self.encoder_name, q)
+            cached = self.embedding_cache.get(key)
+            if cached is not None:
+                vectors[i] = cached
+            else:
+                missing.setdefault(key, []).append(i)
+        if missing:
+            texts = [query_texts[idxs[0]] for idxs in missing.values()]
+            encoded = np.asarray(self.query_emb_model.encode(texts), dtype=np.float32)
+            for (key, idxs), vector in zip(missing.items(), encoded):
+                vector = self.embedding_cache.put(key, vector)
+                for i in idxs:
+                    vectors[i] = vector
+        return np.stack(vectors)
+    def chroma_search_batch(self, query_texts, top_k=10, filters=None, profile=None):
+        """
+        Semantic search for many queries: one multi-embedding query per collection.
+        """
+        embeddings = self.embed_queries(query_texts)
+        results_qa = self._query_qa(embeddings, top_k, filters, profile)
+        results_utterances = self._query_utterances(embeddings, top_k, filters, profile)
+        return [
+            self._normalize_chroma_results(results_qa, results_utterances, row=i)
+            for i in range(len(query_texts))
+        ]
+    def chroma_search(self, query_text, top_k=10, threshold=None, filters=None, profile=None):
         """
         Search top-k similar questions from both QA and utterances collections.
-        Combines results and reranks by distance score.
+        Combines results and reranks by distance score. ``filters`` are
+        applied by Chroma as a ``where`` clause; ``profile`` (fast, balanced,
+        exhaustive) sets how hard the HNSW search tries.
         """
-        print('bad bunny')
-        embedding = self.query_emb_model.encode(query_text)
+        embedding = self.embed_query(query_text)
 
         # Query both collections
-        results_qa = self.qa_collection.query(query_embeddings=embedding, n_results=top_k)
-        results_utterances = self.utterances_collection.query(query_embeddings=embedding, n_results=top_k)
-        
+        results_qa = self._query_qa(embedding, top_k, filters, profile)
+        results_utterances = self._query_utterances(embedding, top_k, filters, profile)
+        return self._normalize_chroma_results(results_qa, results_utterances)
+    async def achroma_search(self, query_text, top_k=10, filters=None, profile=None):
+        """
+        Async variant of chroma_search: encodes the query off the event loop,
+        then queries the QA and utterances collections in parallel.
+        """
+        embedding = await self._run_blocking(self.embed_query, query_text)
+        results_qa, results_utterances = await asyncio.gather(
+            self._run_blocking(self._query_qa, embedding, top_k, filters, profile),
+            self._run_blocking(self._query_utterances, embedding, top_k, filters, profile),
+        )
+        return self._normalize_chroma_results(results_qa, results_utterances)
+    @timed("normalize")
+    def _normalize_chroma_results(self, results_qa, results_utterances, row=0):
+        """Merge one query row (``row``) of the two collections' query results."""
         # Combine results from both collections
         combined_results = []
         
         # Process QA collection results
-        if results_qa['ids'] and len(results_qa['ids'][0]) > 0:
-            for i in range(len(results_qa['ids'][0])):
+        if results_qa['ids'] and len(results_qa['ids'][row]) > 0:
+            for i in range(len(results_qa['ids'][row])):
                 combined_results.append({
-                    'id': results_qa['ids'][0][i],
-                    'distance': results_qa['distances'][0][i],
-                    'metadata': results_qa['metadatas'][0][i],
-                    'document': results_qa['documents'][0][i],
+                    'id': results_qa['ids'][row][i],
+                    'distance': results_qa['distances'][row][i],
+                    'metadata': results_qa['metadatas'][row][i],
+                    'document': results_qa['documents'][row][i],
                     'source': 'qa_collection'
                 })
         
         # Process utterances collection results
-        if results_utterances['ids'] and len(results_utterances['ids'][0]) > 0:
-            for i in range(len(results_utterances['ids'][0])):
+        if results_utterances['ids'] and len(results_utterances['ids'][row]) > 0:
+            for i in range(len(results_utterances['ids'][row])):
                 combined_results.append({
-                    'id': results_utterances['ids'][0][i],
-                    'distance': results_utterances['distances'][0][i],
-                    'metadata': results_utterances['metadatas'][0][i],
-                    'document': results_utterances['documents'][0][i],
+                    'id': results_utterances['ids'][row][i],
+                    'distance': results_utterances['distances'][row][i],
+                    'metadata': results_utterances['metadatas'][row][i],
+                    'document': results_utterances['documents'][row][i],
                     'source': 'utterances_collection'
                 })
         
@@ -102,26 +359,24 @@ class Retriever:
             doc = r['document']
             src = r['source']
             base = {
-                'id': md.get('id') or r['id'],
-                'title': md.get('title', ''),
-                'podcast_title': md.get('podcast_title', ''),
-                'episode_description': md.get('description', ''),
-                'author': md.get('author', ''),
-                'date_published': md.get('date_published', ''),
-                'duration': md.get('duration', 0) or 0,
-                'enclosure_url': md.get('enclosure_url', ''),
+                'id': episode_id_of(md) or r['id'],
+                **self.episodes.hydrate(md),
                 'start': md.get('start'),
                 'end': md.get('end'),
-                'episode_image': md.get('episode_image', ''),
-                'podcast_url': md.get('podcast_url', ''),
                 'score': r['distance'],
                 'source': src,
             }
             if src == 'qa_collection':
+                # slim QA vectors keep question/answer only in the JSON document
+                qa = json.loads(doc) if 'question' not in md and doc else md
+                postings = decode_postings(md.get('postings'))
                 normalized.append(SearchResult(**{
                     **base,
-                    'question': md.get('question', ''),
-                    'answer': md.get('answer', ''),
+                    'question': qa.get('question', ''),
+                    'answer': qa.get('answer', ''),
+                    'postings': [
+                        {'episode_id': p[0], 'start': p[1], 'end': p[2]} for p in postings
+                    ] if len(postings) > 1 else None,
                 }))
             else:
                 normalized.append(SearchResult(**{
@@ -131,46 +386,67 @@ class Retriever:
 
         return normalized
     
-    def es_search(self, query_text, top_k=10):
-        """
-        Placeholder for Elasticsearch search implementation.
-        """
-        es = ESIndexer().get_client()
-        results = es.search(
-            index="utterances",
-            body={
-                "query": {
-                    "multi_match": {
-                        "query": query_text,
-                        "fields": ["text"]
-                    }
-                },
-                "highlight": {
-                    "fields": {
-                        "text": {}
-                    }
-                },
-                "size": top_k
+    def _es_body(self, query_text, top_k, filters=None):
+        query = {
+            "multi_match": {
+                "query": query_text,
+                "fields": ["text"]
             }
-        )
-        hits = results['hits']['hits']
+        }
+        if filters is not None and filters.es_filter():
+            # filter context: no scoring, cached by ES across queries
+            query = {"bool": {"must": query, "filter": filters.es_filter()}}
+        return {
+            "query": query,
+            "highlight": {
+                "fields": {
+                    "text": {}
+                }
+            },
+            # display fields are hydrated from the episode table, don't ship them back
+            "_source": ["episode_id", "id", "start", "end", "speaker", "text"],
+            "size": top_k
+        }
+    def es_search(self, query_text, top_k=10, filters=None):
+        """
+        Keyword search over the utterances index.
+        """
+        if filters is not None and not filters.searches("utterance"):
+            return []
+        es = self.es_indexer.get_client()
+        with stage("es"):
+            results = es.search(index="utterances", body=self._es_body(query_text, top_k, filters))
+        return self._normalize_es_hits(results['hits']['hits'])
+    def es_msearch(self, query_texts, top_k=10, filters=None):
+        """
+        Keyword search for many queries in a single _msearch round trip.
+        """
+        if filters is not None and not filters.searches("utterance"):
+            return [[] for _ in query_texts]
+        es = self.es_indexer.get_client()
+        searches = []
+        for q in query_texts:
+            searches.append({"index": "utterances"})
+            searches.append(self._es_body(q, top_k, filters))
+        with stage("es"):
+            responses = es.msearch(body=searches)["responses"]
+        out = []
+        for resp in responses:
+            if "error" in resp:
+                raise RuntimeError(f"Elasticsearch msearch error: {resp['error']}")
+            out.append(self._normalize_es_hits(resp['hits']['hits']))
+        return out
+    @timed("normalize")
+    def _normalize_es_hits(self, hits):
         # Normalize to SearchResult list
         normalized: List[SearchResult] = []
         for h in hits:
             src = h.get('_source', {})
             base = {
-                'id': (src.get('id') or h.get('_id')) or '',
-                'title': src.get('title') or '',
-                'podcast_title': src.get('podcast_title') or '',
-                'episode_description': src.get('description') or '',
-                'author': src.get('author') or '',
-                'date_published': src.get('date_published') or '',
-                'duration': (src.get('duration') or 0) or 0,
-                'enclosure_url': src.get('enclosure_url') or '',
+                'id': (episode_id_of(src) or h.get('_id')) or '',
+                **self.episodes.hydrate(src),
                 'start': src.get('start'),
                 'end': src.get('end'),
-                'episode_image': src.get('episode_image') or '',
-                'podcast_url': src.get('podcast_url') or '',
                 'score': float(h.get('_score', 0.0)),
                 'source': 'elasticsearch',
             }
@@ -187,12 +463,134 @@ class Retriever:
             for r in normalized:
                 r.score = (r.score - min_score) / span if span > 0 else 1.0
         return normalized
-    def hybrid_search(self, query_text, top_k=20):
+    @timed("search")
+    def hybrid_search(self, query_text, top_k=20, filters=None, profile=None):
+        """
+        Combines ChromaDB and Elasticsearch search results with an RRF scorer.
+        ``filters`` (a SearchFilters) are pushed down into both engines;
+        ``profile`` picks the vector search quality (see search/profiles.py).
+        """
+        cache_key = self.result_cache.key(
+            query_text, top_k, self._cache_scope(filters, profile), self.index_generation.generation)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        chroma_results = self.chroma_search(query_text, top_k=top_k*2, filters=filters, profile=profile)
+        es_results = self.es_search(query_text, top_k=top_k*2, filters=filters)
+        combined = self._fuse(chroma_results, es_results, top_k)
+        self.result_cache.put(cache_key, combined)
+        return combined
+    @timed("search")
+    async def ahybrid_search(self, query_text, top_k=20, filters=None, profile=None):
+        """
+        Async variant of hybrid_search. The ES keyword query is started right
+        away and runs while the query embedding is computed and both Chroma
+        collections are queried, so latency is the slowest leg instead of the sum.
+        """
+        cache_key = self.result_cache.key(
+            query_text, top_k, self._cache_scope(filters, profile), self.index_generation.generation)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        es_task = asyncio.ensure_future(self._run_blocking(self.es_search, query_text, top_k=top_k*2, filters=filters))
+        try:
+            chroma_results = await self.achroma_search(query_text, top_k=top_k*2, filters=filters, profile=profile)
+        except BaseException:
+            es_task.cancel()
+            raise
+        es_results = await es_task
+        combined = self._fuse(chroma_results, es_results, top_k)
+        self.result_cache.put(cache_key, combined)
+        return combined
+    async def astream_hybrid_search(self, query_text, top_k=20, filters=None, profile=None):
+        """
+        Same search as ahybrid_search, but yields (event, results) pairs as each
+        leg finishes: "keyword" (ES), "semantic" (Chroma), then "final" with
+        the fused ranking. A result-cache hit yields only "final".
+        """
+        cache_key = self.result_cache.key(
+            query_text, top_k, self._cache_scope(filters, profile), self.index_generation.generation)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            yield "final", cached
+            return
+        es_task = asyncio.ensure_future(self._run_blocking(self.es_search, query_text, top_k=top_k*2, filters=filters))
+        chroma_task = asyncio.ensure_future(self.achroma_search(query_text, top_k=top_k*2, filters=filters, profile=profile))
+        events = {es_task: "keyword", chroma_task: "semantic"}
+        pending = set(events)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield events[task], task.result()[:top_k]
+        finally:
+            for task in pending:
+                task.cancel()
+        combined = self._fuse(chroma_task.result(), es_task.result(), top_k)
+        self.result_cache.put(cache_key, combined)
+        yield "final", combined
+    def batch_hybrid_search(self, query_texts, top_k=20, filters=None, profile=None):
+        """
+        hybrid_search for a list of queries, amortizing round trips: one
+        encode call, one Chroma query per collection and one ES _msearch.
+        Returns one fused result list per input query, in order; ``filters``
+        apply to every query.
+        """
+        generation = self.index_generation.generation
+        scope = self._cache_scope(filters, profile)
+        keys = [self.result_cache.key(q, top_k, scope, generation) for q in query_texts]
+        out = [self.result_cache.get(k) for k in keys]
+        todo = self._batch_misses(keys, out)
+        if todo:
+            texts = [query_texts[idxs[0]] for idxs in todo.values()]
+            chroma_batches = self.chroma_search_batch(texts, top_k=top_k*2, filters=filters, profile=profile)
+            es_batches = self.es_msearch(texts, top_k=top_k*2, filters=filters)
+            self._fill_batch(out, keys, todo, chroma_batches, es_batches, top_k)
+        return out
+    async def abatch_hybrid_search(self, query_texts, top_k=20, filters=None, profile=None):
         """
-        Combines ChromaDB and Elasticsearch search results with an RRF scorer 
+        Async variant of batch_hybrid_search; the ES _msearch runs while the
+        queries are embedded and the collections are queried.
         """
-        chroma_results = self.chroma_search(query_text, top_k=top_k*2)
-        es_results = self.es_search(query_text, top_k=top_k*2)
+        generation = self.index_generation.generation
+        scope = self._cache_scope(filters, profile)
+        keys = [self.result_cache.key(q, top_k, scope, generation) for q in query_texts]
+        out = [self.result_cache.get(k) for k in keys]
+        todo = self._batch_misses(keys, out)
+        if todo:
+            texts = [query_texts[idxs[0]] for idxs in todo.values()]
+            es_task = asyncio.ensure_future(self._run_blocking(self.es_msearch, texts, top_k=top_k*2, filters=filters))
+            try:
+                embeddings = await self._run_blocking(self.embed_queries, texts)
+                results_qa, results_utterances = await asyncio.gather(
+                    self._run_blocking(self._query_qa, embeddings, top_k*2, filters, profile),
+                    self._run_blocking(self._query_utterances, embeddings, top_k*2, filters, profile),
+                )
+            except BaseException:
+                es_task.cancel()
+                raise
+            chroma_batches = [
+                self._normalize_chroma_results(results_qa, results_utterances, row=i)
+                for i in range(len(texts))
+            ]
+            es_batches = await es_task
+            self._fill_batch(out, keys, todo, chroma_batches, es_batches, top_k)
+        return out
+    def _batch_misses(self, keys, out):
+        # cache key -> positions in the batch, so repeated queries are searched once
+        todo = {}
+        for i, (key, cached) in enumerate(zip(keys, out)):
+            if cached is None:
+                todo.setdefault(key, []).append(i)
+        return todo
+    def _fill_batch(self, out, keys, todo, chroma_batches, es_batches, top_k):
+        for (key, idxs), chroma_results, es_results in zip(todo.items(), chroma_batches, es_batches):
+            combined = self._fuse(chroma_results, es_results, top_k)
+            self.result_cache.put(key, combined)
+            for i in idxs:
+                out[i] = list(combined)
+    @timed("fuse")
+    def _fuse(self, chroma_results, es_results, top_k):
         # Simple union sorted by score descending (placeholder for RRF)
         combined: List[SearchResult] = sorted(
             chroma_results + es_results,
@@ -0,0 +1,113 @@
+"""Bounded LRU + TTL cache for query embeddings."""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Canonical form of a query string used for cache keys."""
+
+    return _WHITESPACE.sub(" ", (text or "").strip().lower())
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache of query vectors with a time-to-live.
+
+    Vectors are stored as compact numpy arrays (float16 by default) and handed
+    back as float32 so callers never see the storage dtype.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        dtype: str = "float16",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.dtype = np.dtype(dtype)
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def key(model_name: str, query_text: str) -> tuple[str, str]:
+        return (model_name, normalize_query(query_text))
+
+    def get(self, key: Hashable) -> np.ndarray | None:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, vector = entry
+            if self.ttl_seconds and now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return vector.astype(np.float32)
+
+    def put(self, key: Hashable, vector) -> np.ndarray:
+        """Store ``vector``; returns the stored copy as float32, i.e. what later hits return."""
+
+        compact = np.asarray(vector, dtype=self.dtype)
+        compact.setflags(write=False)
+        now = self._clock()
+        with self._lock:
+            self._entries[key] = (now, compact)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return compact.astype(np.float32)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]) -> np.ndarray:
+        """Return the cached vector for ``key`` or compute, store and return it."""
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        # a miss returns the stored rounding too, so results don't depend on cache state
+        return self.put(key, np.asarray(compute(), dtype=np.float32))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            size = len(self._entries)
+            nbytes = sum(v.nbytes for _, v in self._entries.values())
+        lookups = self.hits + self.misses
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "dtype": self.dtype.name,
+            "bytes": nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
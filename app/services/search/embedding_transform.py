@@ -0,0 +1,99 @@
+"""Index-time dimensionality reduction for local vector snapshots.
+
+A transform is fitted on a snapshot's corpus embeddings and saved next to
+them (``transform.npz``); the snapshot stores only the reduced vectors and
+applies the same transform to every query, so index and queries can never
+disagree about it. Two methods:
+
+* ``pca``: projection onto the top eigenvectors of the uncentred second
+  moment ``E[x xᵀ]``, the rank-``d`` map that best preserves inner
+  products (centring would shift every document's score by ``-q·m - m·x``)
+* ``truncate``: keep the first ``d`` components (Matryoshka-style models)
+
+Spec strings look like ``pca:256`` or ``truncate:384``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+from pathlib import Path
+
+import numpy as np
+
+METHODS = ("pca", "truncate")
+
+
+def parse_spec(spec: str | None) -> tuple[str, int] | None:
+    """``"pca:256"`` -> ``("pca", 256)``; empty/None -> None."""
+
+    if not spec:
+        return None
+    method, _, dim = spec.partition(":")
+    method = method.strip().lower()
+    if method not in METHODS or not dim.strip().isdigit():
+        raise ValueError(f"Invalid embedding transform '{spec}', expected e.g. 'pca:256' or 'truncate:384'")
+    return method, int(dim)
+
+
+class EmbeddingTransform:
+    """Linear map ``x @ components`` from ``dim_in`` to ``dim_out`` dimensions."""
+
+    def __init__(self, method: str, components: np.ndarray, explained_variance: float | None = None):
+        self.method = method
+        self.components = np.ascontiguousarray(components, dtype=np.float32)
+        self.explained_variance = explained_variance
+
+    @property
+    def dim_in(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def dim_out(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, method: str, dim: int, sample: int = 100_000, seed: int = 0) -> "EmbeddingTransform":
+        dim_in = vectors.shape[1]
+        if not 0 < dim <= dim_in:
+            raise ValueError(f"Cannot reduce {dim_in}-d embeddings to {dim} dimensions")
+        if method == "truncate":
+            return cls(method, np.eye(dim_in, dim, dtype=np.float32))
+        if method != "pca":
+            raise ValueError(f"Unknown embedding transform method '{method}'")
+
+        rows = np.arange(len(vectors))
+        if len(rows) > sample:
+            rows = np.sort(np.random.default_rng(seed).choice(rows, sample, replace=False))
+        x = np.asarray(vectors[rows], dtype=np.float64)
+        eigvals, eigvecs = np.linalg.eigh(x.T @ x / len(x))
+        order = np.argsort(eigvals)[::-1][:dim]
+        explained = float(eigvals[order].sum() / eigvals.sum())
+        return cls(method, eigvecs[:, order], explained_variance=explained)
+
+    def apply(self, x: np.ndarray) -> np.ndarray:
+        return np.asarray(x, dtype=np.float32) @ self.components
+
+    def save(self, path: str | Path) -> str:
+        """Write the artifact; returns its sha256, recorded in the snapshot manifest."""
+
+        buf = io.BytesIO()
+        np.savez(buf, method=np.array(self.method), components=self.components,
+                 explained_variance=np.array(self.explained_variance if self.explained_variance is not None else np.nan))
+        data = buf.getvalue()
+        Path(path).write_bytes(data)
+        return hashlib.sha256(data).hexdigest()
+
+    @classmethod
+    def load(cls, path: str | Path) -> "EmbeddingTransform":
+        with np.load(path) as data:
+            explained = float(data["explained_variance"])
+            return cls(str(data["method"]), data["components"], None if np.isnan(explained) else explained)
+
+    def describe(self) -> dict[str, object]:
+        return {
+            "method": self.method,
+            "dim_in": self.dim_in,
+            "dim_out": self.dim_out,
+            "explained_variance": round(self.explained_variance, 4) if self.explained_variance is not None else None,
+        }
@@ -0,0 +1,180 @@
+"""In-memory episode table used to hydrate search hits.
+
+Chroma and Elasticsearch documents only carry ``episode_id`` plus the
+per-hit fields (start/end/speaker); titles, descriptions, images and URLs
+are joined in here at query time. The table is loaded from Postgres on
+warm-up and reloaded in the background when the index generation changes
+or ``max_age`` passes, so metadata edits show up without a reindex.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Mapping, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class EpisodeMetadata(NamedTuple):
+    title: str
+    podcast_title: str
+    description: str
+    author: str
+    date_published: str
+    duration: int
+    enclosure_url: str
+    episode_image: str
+    podcast_url: str
+
+
+def episode_id_of(metadata: Mapping) -> str | None:
+    """Episode id of an index document; older documents stored it as ``id``."""
+
+    return metadata.get("episode_id") or metadata.get("id")
+
+
+async def load_episode_metadata() -> dict[str, EpisodeMetadata]:
+    from sqlalchemy import select
+
+    from app.db.data_models.episode import Episode
+    from app.db.data_models.podcast import Podcast
+    from app.db.session import AsyncSessionLocal
+
+    stmt = (
+        select(
+            Episode.id, Episode.title, Podcast.title, Episode.description, Podcast.author,
+            Episode.date_published, Episode.duration, Episode.enclosure_url,
+            Episode.episode_image, Episode.podcast_url,
+        )
+        .join(Episode.podcast)
+    )
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(stmt)).all()
+
+    episodes = {}
+    for ep_id, title, podcast_title, description, author, published, duration, enclosure, image, url in rows:
+        episodes[ep_id] = EpisodeMetadata(
+            title=title or "",
+            podcast_title=podcast_title or "",
+            description=description or "",
+            author=author or "",
+            date_published=published.isoformat() if isinstance(published, datetime) else (published or ""),
+            duration=duration or 0,
+            enclosure_url=enclosure or "",
+            episode_image=image or "",
+            podcast_url=url or "",
+        )
+    return episodes
+
+
+def _load_from_postgres() -> dict[str, EpisodeMetadata]:
+    from app.db.session import run_async
+
+    return run_async(load_episode_metadata())
+
+
+class EpisodeMetadataCache:
+    """Episode id -> :class:`EpisodeMetadata`, swapped atomically on reload.
+
+    ``loader`` is a blocking callable returning the full table (Postgres by
+    default). Hits whose episode is unknown fall back to whatever display
+    fields the index document itself carries, so indexes built before the
+    slim format keep rendering.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Mapping[str, EpisodeMetadata]] | None = None,
+        generation: Callable[[], int] | None = None,
+        max_age: float = 600.0,
+    ):
+        self._loader = loader or _load_from_postgres
+        self._generation = generation
+        self.max_age = max_age
+        self._episodes: Mapping[str, EpisodeMetadata] = {}
+        self._loaded_generation: int | None = None
+        self._loaded_at = float("-inf")
+        self._refreshing = threading.Lock()
+        self.reloads = 0
+        self.reload_failures = 0
+        self.misses = 0
+
+    def refresh(self) -> int:
+        """Reload the table now (blocking); returns the number of episodes."""
+
+        with self._refreshing:
+            return self._reload()
+
+    def _reload(self) -> int:
+        generation = self._generation() if self._generation else None
+        episodes = dict(self._loader())
+        self._episodes = episodes
+        self._loaded_generation = generation
+        self._loaded_at = time.monotonic()
+        self.reloads += 1
+        return len(episodes)
+
+    def _background_reload(self) -> None:
+        try:
+            count = self._reload()
+            logger.info(f"🔄 Episode metadata reloaded ({count} episodes)")
+        except Exception as e:
+            # keep serving the previous table; next stale check retries
+            self.reload_failures += 1
+            self._loaded_at = time.monotonic()
+            logger.warning(f"Episode metadata reload failed: {e}")
+        finally:
+            self._refreshing.release()
+
+    def _maybe_reload(self) -> None:
+        stale = time.monotonic() - self._loaded_at > self.max_age
+        if not stale and self._generation is not None:
+            stale = self._generation() != self._loaded_generation
+        if stale and self._refreshing.acquire(blocking=False):
+            threading.Thread(target=self._background_reload, name="episode-metadata-reload", daemon=True).start()
+
+    def get(self, episode_id: str | None) -> EpisodeMetadata | None:
+        self._maybe_reload()
+        return self._episodes.get(episode_id) if episode_id else None
+
+    def hydrate(self, metadata: Mapping) -> dict[str, object]:
+        """Display fields for one hit, keyed like :class:`SearchResult`."""
+
+        episode = self.get(episode_id_of(metadata))
+        if episode is None:
+            self.misses += 1
+            return {
+                "title": metadata.get("title") or "",
+                "podcast_title": metadata.get("podcast_title") or "",
+                "episode_description": metadata.get("description") or "",
+                "author": metadata.get("author") or "",
+                "date_published": metadata.get("date_published") or "",
+                "duration": metadata.get("duration") or 0,
+                "enclosure_url": metadata.get("enclosure_url") or "",
+                "episode_image": metadata.get("episode_image") or "",
+                "podcast_url": metadata.get("podcast_url") or "",
+            }
+        return {
+            "title": episode.title,
+            "podcast_title": episode.podcast_title,
+            "episode_description": episode.description,
+            "author": episode.author,
+            "date_published": episode.date_published,
+            "duration": episode.duration,
+            "enclosure_url": episode.enclosure_url,
+            "episode_image": episode.episode_image,
+            "podcast_url": episode.podcast_url,
+        }
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "episodes": len(self._episodes),
+            "generation": self._loaded_generation,
+            "age_s": round(time.monotonic() - self._loaded_at, 1) if self.reloads else None,
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+            "misses": self.misses,
+        }
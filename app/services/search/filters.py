@@ -0,0 +1,181 @@
+"""Search filters pushed down into the vector and keyword engines.
+
+Index documents carry a few filterable attributes next to ``episode_id``
+(see :func:`filter_attributes`): ``podcast_id``, ``published_at`` (epoch
+seconds, so date ranges are numeric comparisons), ``duration`` and, on
+utterances, ``speaker``. :class:`SearchFilters` turns a request's filters
+into a Chroma ``where`` clause and Elasticsearch ``bool.filter`` clauses,
+so both engines prune before scoring instead of the API over-fetching and
+discarding. Documents indexed before these attributes existed never match
+a filter; reindex to make them filterable.
+
+A QA vector stands for every occurrence (posting) of its pair within one
+podcast, so ``podcast_id`` is exact but episodes differ in date and
+duration. QA vectors keep the earliest/latest ``published_at`` and the
+shortest/longest ``duration`` of their postings (``published_at_last``,
+``duration_max``); range filters select on that envelope and
+:meth:`SearchFilters.narrow_results` then keeps only the postings that
+really match.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Literal
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.services.indexing.content_ids import decode_postings, encode_postings
+
+# metadata keys the indexers write and local snapshots keep as columns
+FILTER_FIELDS = ("podcast_id", "published_at", "published_at_last", "duration", "duration_max", "speaker")
+# upper end of a QA vector's range over its postings, keyed by the field it bounds
+QA_RANGE_UPPER = {"published_at": "published_at_last", "duration": "duration_max"}
+# position of each range field in a posting [episode_id, start, end, published_at, duration]
+_POSTING_FIELDS = {"published_at": 3, "duration": 4}
+
+
+def _epoch(value: datetime | str | None) -> int | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        # Postgres stores naive UTC timestamps
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def filter_attributes(podcast_id: str | None, date_published: datetime | str | None, duration: int | None) -> dict:
+    """Filterable attributes of one episode, merged into each of its index documents."""
+
+    attributes = {}
+    if podcast_id:
+        attributes["podcast_id"] = str(podcast_id)
+    published_at = _epoch(date_published)
+    if published_at is not None:
+        attributes["published_at"] = published_at
+    if duration is not None:
+        attributes["duration"] = int(duration)
+    return attributes
+
+
+class SearchFilters(BaseModel):
+    """Optional restrictions on a search; every set field must match."""
+
+    podcast_ids: list[str] | None = Field(default=None, min_length=1)
+    published_after: datetime | None = None
+    published_before: datetime | None = None
+    min_duration: int | None = Field(default=None, ge=0, description="seconds")
+    max_duration: int | None = Field(default=None, ge=0, description="seconds")
+    speakers: list[str] | None = Field(default=None, min_length=1)
+    # "qa" searches only question/answer pairs, "utterance" only transcript utterances
+    source: Literal["qa", "utterance"] | None = None
+
+    @model_validator(mode="after")
+    def _check_ranges(self) -> "SearchFilters":
+        if self.published_after and self.published_before and self.published_after > self.published_before:
+            raise ValueError("published_after must not be later than published_before")
+        if self.min_duration is not None and self.max_duration is not None and self.min_duration > self.max_duration:
+            raise ValueError("min_duration must not be greater than max_duration")
+        return self
+
+    def searches(self, source: str) -> bool:
+        """Whether results from ``source`` ("qa" or "utterance") can match at all."""
+
+        if self.source is not None and self.source != source:
+            return False
+        # QA pairs have no speaker
+        return not (source == "qa" and self.speakers)
+
+    def _ranges(self) -> dict[str, dict[str, int]]:
+        ranges: dict[str, dict[str, int]] = {}
+        if self.published_after is not None:
+            ranges.setdefault("published_at", {})["gte"] = _epoch(self.published_after)
+        if self.published_before is not None:
+            ranges.setdefault("published_at", {})["lte"] = _epoch(self.published_before)
+        if self.min_duration is not None:
+            ranges.setdefault("duration", {})["gte"] = self.min_duration
+        if self.max_duration is not None:
+            ranges.setdefault("duration", {})["lte"] = self.max_duration
+        return ranges
+
+    def chroma_where(self, source: str = "utterance") -> dict | None:
+        clauses = []
+        if self.podcast_ids:
+            clauses.append({"podcast_id": {"$in": self.podcast_ids}})
+        if self.speakers:
+            clauses.append({"speaker": {"$in": self.speakers}})
+        for field, bounds in self._ranges().items():
+            for op, value in bounds.items():
+                # QA vectors overlap [value, ...] when their latest/longest posting does
+                key = QA_RANGE_UPPER[field] if source == "qa" and op == "gte" else field
+                # Chroma takes a single operator per clause
+                clauses.append({key: {f"${op}": value}})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def es_filter(self) -> list[dict]:
+        clauses = []
+        if self.podcast_ids:
+            clauses.append({"terms": {"podcast_id": self.podcast_ids}})
+        if self.speakers:
+            clauses.append({"terms": {"speaker": self.speakers}})
+        clauses.extend({"range": {field: bounds}} for field, bounds in self._ranges().items())
+        return clauses
+
+    def _posting_matches(self, posting: list) -> bool:
+        for field, bounds in self._ranges().items():
+            index = _POSTING_FIELDS[field]
+            value = posting[index] if len(posting) > index else None
+            if value is None:
+                return False
+            if value < bounds.get("gte", value) or value > bounds.get("lte", value):
+                return False
+        return True
+
+    def narrow_metadata(self, metadata: dict | None) -> dict | None:
+        """A QA hit's metadata restricted to the postings inside the ranges; None when none are."""
+
+        postings = decode_postings((metadata or {}).get("postings"))
+        if not postings or not self._ranges():
+            # single occurrence: the envelope is the value itself, the where clause was exact
+            return metadata
+        matching = [p for p in postings if self._posting_matches(p)]
+        if not matching:
+            return None
+        if len(matching) == len(postings):
+            return metadata
+        metadata = dict(metadata)
+        episode_id, start, end, published_at, duration = (matching[0] + [None] * 5)[:5]
+        metadata.update(episode_id=episode_id, start=start, end=end, occurrences=len(matching))
+        for field, value in (("published_at", published_at), ("duration", duration)):
+            if value is not None:
+                metadata[field] = value
+        if len(matching) > 1:
+            metadata["postings"] = encode_postings(matching)
+        else:
+            metadata.pop("postings", None)
+        return metadata
+
+    def narrow_results(self, results: dict) -> dict:
+        """Apply :meth:`narrow_metadata` to every hit of a Chroma-shaped QA result."""
+
+        if not self._ranges() or not results.get("metadatas"):
+            return results
+        narrowed = {key: [] if isinstance(rows, list) and rows and isinstance(rows[0], list) else rows
+                    for key, rows in results.items()}
+        for row, metadatas in enumerate(results["metadatas"]):
+            keep = [(i, m) for i, m in ((i, self.narrow_metadata(m)) for i, m in enumerate(metadatas)) if m is not None]
+            for key, rows in results.items():
+                if not (isinstance(rows, list) and rows and isinstance(rows[0], list)):
+                    continue
+                if key == "metadatas":
+                    narrowed[key].append([m for _, m in keep])
+                else:
+                    narrowed[key].append([rows[row][i] for i, _ in keep])
+        return narrowed
+
+    def cache_key(self) -> dict | None:
+        return self.model_dump(mode="json", exclude_none=True) or None
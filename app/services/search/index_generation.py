@@ -0,0 +1,92 @@
+"""Index generation counter shared between the pipeline and the API.
+
+The indexing steps bump it after writing to Chroma or Elasticsearch; the API
+watches the file to invalidate index-derived state (cached results, hydrated
+metadata) without a restart. In production it lives under /opt/stories so
+both containers see it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+_DEFAULT_PATH = Path("data/index_generation.json")
+_PROD_PATH = Path("/opt/stories/index_generation.json")
+
+
+def generation_path() -> Path:
+    override = os.getenv("INDEX_GENERATION_PATH")
+    if override:
+        return Path(override)
+    env = os.getenv("APP_ENV", "development").lower()
+    return _PROD_PATH if env == "production" else _DEFAULT_PATH
+
+
+def _load(path: Path) -> dict[str, object]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def read_generation(path: Path | None = None) -> int:
+    """Current generation, 0 when no index build has been recorded yet."""
+
+    return int(_load(path or generation_path()).get("generation", 0))
+
+
+def bump_generation(source: str, path: Path | None = None) -> int:
+    """Increment the generation after ``source`` finished rebuilding an index."""
+
+    path = path or generation_path()
+    state = _load(path)
+    generation = int(state.get("generation", 0)) + 1
+    now = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    sources = dict(state.get("sources") or {})
+    sources[source] = now
+    state = {"generation": generation, "updated_at": now, "sources": sources}
+
+    # write-then-rename so readers never see a half-written file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+    return generation
+
+
+class GenerationWatcher:
+    """Cheap, throttled view of the generation file for hot paths.
+
+    The file is stat'ed at most once per ``check_interval`` seconds and only
+    re-read when its mtime changes.
+    """
+
+    def __init__(self, path: Path | None = None, check_interval: float = 2.0):
+        self.path = path or generation_path()
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._mtime: float | None = None
+        self._generation = read_generation(self.path)
+
+    @property
+    def generation(self) -> int:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._generation
+        with self._lock:
+            if now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                try:
+                    mtime = self.path.stat().st_mtime
+                except FileNotFoundError:
+                    mtime = None
+                if mtime != self._mtime:
+                    self._mtime = mtime
+                    self._generation = read_generation(self.path)
+        return self._generation
@@ -0,0 +1,674 @@
+"""In-process vector search over snapshots exported from Chroma.
+
+Step 6 exports each Chroma collection to ``<local_index_dir()>/<collection>/``:
+
+    manifest.json                        row count, dim, build settings
+    records.jsonl + records.offsets.npy  [id, document, metadata] per row
+    embeddings.npy                       L2-normalised float16 vectors
+    embeddings.int8.npy + .scale.npy     the same, int8 with a per-dimension scale
+    embeddings.bits.npy                  sign bits, packed (96 bytes at 768-d)
+    hnsw.bin                             hnswlib cosine index over the rows
+    columns.npz                          filterable metadata (search/filters.py) as arrays
+    transform.npz                        optional PCA/truncation (see embedding_transform.py)
+
+With a transform, every file above holds the reduced vectors and queries
+are mapped through the same transform before searching.
+
+The API opens a snapshot with :class:`LocalVectorIndex` (VECTOR_BACKEND=local)
+and answers queries without a network hop: through the HNSW graph, exactly
+(``mode="exact"``: one blocked matrix product + argpartition over the
+memory-mapped matrix, which every uvicorn worker shares through the page
+cache), or in two stages (``mode="binary"``: Hamming distance over the
+in-RAM sign bits picks candidates, the float16 rows re-rank them). ``query()`` returns the same shape as Chroma's
+``Collection.query`` so the Retriever code path does not change.
+
+Chroma-style ``where`` clauses are evaluated against ``columns.npz`` into a
+row subset first; exact and binary search only scan that subset, HNSW
+either scans it too (small subsets) or walks the graph with a filter.
+
+    python -m app.services.search.local_index export --collection utterances
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+
+from app.services.search.embedding_transform import EmbeddingTransform, parse_spec
+from app.services.search.filters import FILTER_FIELDS
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_DIR = Path("data/vector_index")
+_PROD_DIR = Path("/opt/stories/vector_index")
+
+MANIFEST_FILE = "manifest.json"
+RECORDS_FILE = "records.jsonl"
+OFFSETS_FILE = "records.offsets.npy"
+EMBEDDINGS_FILE = "embeddings.npy"
+INT8_FILE = "embeddings.int8.npy"
+INT8_SCALE_FILE = "embeddings.int8.scale.npy"
+BITS_FILE = "embeddings.bits.npy"
+TRANSFORM_FILE = "transform.npz"
+COLUMNS_FILE = "columns.npz"
+HNSW_FILE = "hnsw.bin"
+
+
+def local_index_dir() -> Path:
+    override = os.getenv("LOCAL_INDEX_DIR")
+    if override:
+        return Path(override)
+    env = os.getenv("APP_ENV", "development").lower()
+    return _PROD_DIR if env == "production" else _DEFAULT_DIR
+
+
+def normalize_rows(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+class RecordStore:
+    """Append-only JSON lines with an offsets array, read back through mmap."""
+
+    def __init__(self, directory: Path):
+        self._file = open(directory / RECORDS_FILE, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._offsets = np.load(directory / OFFSETS_FILE, mmap_mode="r")
+
+    @staticmethod
+    def write(directory: Path, records: Iterable[tuple[str, str, dict]]) -> int:
+        offsets = [0]
+        with open(directory / RECORDS_FILE, "wb") as f:
+            for record in records:
+                line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        np.save(directory / OFFSETS_FILE, np.asarray(offsets, dtype=np.int64))
+        return len(offsets) - 1
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def get(self, row: int) -> tuple[str, str, dict]:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return tuple(json.loads(self._data[start:end]))
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+
+def export_collection(collection, directory: str | os.PathLike, batch_size: int = 1000) -> dict:
+    """Write records + normalised float16 embeddings for a Chroma collection into ``directory``."""
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    total = collection.count()
+    embeddings = None
+    columns = {field: [] for field in FILTER_FIELDS}
+
+    def pages():
+        # streams records to disk while filling the embeddings memmap
+        nonlocal embeddings
+        for offset in range(0, total, batch_size):
+            page = collection.get(
+                limit=batch_size, offset=offset,
+                include=["embeddings", "documents", "metadatas"],
+            )
+            vectors = normalize_rows(page["embeddings"])
+            if embeddings is None:
+                embeddings = np.lib.format.open_memmap(
+                    directory / EMBEDDINGS_FILE, mode="w+", dtype=np.float16, shape=(total, vectors.shape[1]),
+                )
+            embeddings[offset:offset + len(vectors)] = vectors
+            for metadata in page["metadatas"]:
+                for field, values in columns.items():
+                    values.append((metadata or {}).get(field))
+            yield from zip(page["ids"], page["documents"], page["metadatas"])
+
+    rows = RecordStore.write(directory, pages())
+    if embeddings is None:
+        raise RuntimeError(f"Collection {collection.name} is empty, nothing to export")
+    if rows != total:
+        raise RuntimeError(f"Collection changed during export ({rows} rows read, {total} expected)")
+    embeddings.flush()
+    write_columns(directory, columns)
+
+    manifest = {
+        "collection": collection.name,
+        "count": total,
+        "dim": int(embeddings.shape[1]),
+        "columns": sorted(field for field, values in columns.items() if any(v is not None for v in values)),
+        "created_at": time.time(),
+    }
+    (directory / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def write_columns(directory: Path, columns: dict[str, list]) -> None:
+    """Store metadata columns for filtering: strings as int32 codes + vocabulary, numbers as float64 (NaN = missing)."""
+
+    arrays = {}
+    for field, values in columns.items():
+        present = [v for v in values if v is not None and v != ""]
+        if not present:
+            continue
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+            arrays[field] = np.array([np.nan if v is None or v == "" else v for v in values], dtype=np.float64)
+        else:
+            vocab = sorted({str(v) for v in present})
+            codes = {v: i for i, v in enumerate(vocab)}
+            arrays[field] = np.array([-1 if v is None or v == "" else codes[str(v)] for v in values], dtype=np.int32)
+            arrays[f"{field}.vocab"] = np.array(vocab, dtype=str)
+    np.savez(directory / COLUMNS_FILE, **arrays)
+
+
+class Columns:
+    """Evaluates Chroma ``where`` clauses over the snapshot's metadata columns."""
+
+    _COMPARE = {"$gt": np.greater, "$gte": np.greater_equal, "$lt": np.less, "$lte": np.less_equal}
+
+    def __init__(self, directory: Path, rows: int):
+        self.rows = rows
+        self._values: dict[str, np.ndarray] = {}
+        self._vocab: dict[str, dict[str, int]] = {}
+        path = directory / COLUMNS_FILE
+        if path.exists():
+            with np.load(path) as data:
+                for name in data.files:
+                    if name.endswith(".vocab"):
+                        self._vocab[name[:-len(".vocab")]] = {v: i for i, v in enumerate(data[name].tolist())}
+                    else:
+                        self._values[name] = data[name]
+
+    def mask(self, where: dict) -> np.ndarray:
+        if "$and" in where:
+            return np.logical_and.reduce([self.mask(clause) for clause in where["$and"]])
+        if "$or" in where:
+            return np.logical_or.reduce([self.mask(clause) for clause in where["$or"]])
+        out = np.ones(self.rows, dtype=bool)
+        for field, condition in where.items():
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, value in condition.items():
+                out &= self._compare(field, op, value)
+        return out
+
+    def _compare(self, field: str, op: str, value) -> np.ndarray:
+        column = self._values.get(field)
+        if column is None:
+            # like Chroma: rows without the attribute never match
+            return np.zeros(self.rows, dtype=bool)
+        vocab = self._vocab.get(field)
+        if vocab is not None:
+            if op in ("$eq", "$ne"):
+                hit = column == vocab.get(str(value), -2)
+                return hit if op == "$eq" else ~hit & (column >= 0)
+            if op in ("$in", "$nin"):
+                hit = np.isin(column, [vocab[str(v)] for v in value if str(v) in vocab])
+                return hit if op == "$in" else ~hit & (column >= 0)
+            raise ValueError(f"Operator {op} is not supported on string field '{field}'")
+        if op in ("$eq", "$ne"):
+            hit = column == value
+            return hit if op == "$eq" else ~hit & ~np.isnan(column)
+        if op in ("$in", "$nin"):
+            hit = np.isin(column, list(value))
+            return hit if op == "$in" else ~hit & ~np.isnan(column)
+        if op in self._COMPARE:
+            return self._COMPARE[op](column, value)  # NaN compares False
+        raise ValueError(f"Unsupported where operator '{op}'")
+
+
+def build_hnsw(directory: str | os.PathLike, m: int = 32, ef_construction: int = 200, threads: int = -1) -> dict:
+    """Build ``hnsw.bin`` from the snapshot's embeddings and record it in the manifest."""
+
+    import hnswlib
+
+    directory = Path(directory)
+    vectors = np.load(directory / EMBEDDINGS_FILE, mmap_mode="r")
+    index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+    index.init_index(max_elements=len(vectors), ef_construction=ef_construction, M=m)
+    chunk = 50_000
+    for start in range(0, len(vectors), chunk):
+        block = np.asarray(vectors[start:start + chunk], dtype=np.float32)
+        index.add_items(block, np.arange(start, start + len(block)), num_threads=threads)
+    index.save_index(str(directory / HNSW_FILE))
+
+    manifest = json.loads((directory / MANIFEST_FILE).read_text())
+    manifest["hnsw"] = {"M": m, "ef_construction": ef_construction}
+    (directory / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def write_int8(directory: str | os.PathLike, chunk: int = 65_536) -> None:
+    """Symmetric int8 copy of ``embeddings.npy`` with one float32 scale per dimension.
+
+    Per-dimension scales fold into the query (``(q * scale) · codes``), so
+    the scan is a plain product over the int8 matrix.
+    """
+
+    directory = Path(directory)
+    vectors = np.load(directory / EMBEDDINGS_FILE, mmap_mode="r")
+    peak = np.zeros(vectors.shape[1], dtype=np.float32)
+    for start in range(0, len(vectors), chunk):
+        block = np.asarray(vectors[start:start + chunk], dtype=np.float32)
+        np.maximum(peak, np.abs(block).max(axis=0), out=peak)
+    scales = np.maximum(peak, 1e-12) / 127.0
+    codes = np.lib.format.open_memmap(directory / INT8_FILE, mode="w+", dtype=np.int8, shape=vectors.shape)
+    for start in range(0, len(vectors), chunk):
+        block = np.asarray(vectors[start:start + chunk], dtype=np.float32)
+        codes[start:start + len(block)] = np.rint(block / scales).astype(np.int8)
+    codes.flush()
+    np.save(directory / INT8_SCALE_FILE, scales)
+
+
+def reduce_embeddings(directory: str | os.PathLike, method: str, dim: int, chunk: int = 65_536) -> dict:
+    """Fit a transform on ``embeddings.npy`` and replace it with the reduced vectors."""
+
+    directory = Path(directory)
+    vectors = np.load(directory / EMBEDDINGS_FILE, mmap_mode="r")
+    transform = EmbeddingTransform.fit(vectors, method, dim)
+    reduced_path = directory / (EMBEDDINGS_FILE + ".reduced")
+    reduced = np.lib.format.open_memmap(reduced_path, mode="w+", dtype=np.float16, shape=(len(vectors), dim))
+    for start in range(0, len(vectors), chunk):
+        reduced[start:start + chunk] = transform.apply(vectors[start:start + chunk])
+    reduced.flush()
+    del vectors, reduced
+    os.replace(reduced_path, directory / EMBEDDINGS_FILE)
+
+    info = {**transform.describe(), "sha256": transform.save(directory / TRANSFORM_FILE)}
+    manifest = json.loads((directory / MANIFEST_FILE).read_text())
+    manifest["dim"] = dim
+    manifest["transform"] = info
+    (directory / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    return info
+
+
+def write_bits(directory: str | os.PathLike, chunk: int = 65_536) -> None:
+    """1 bit per dimension (sign of each component), packed 8 per byte."""
+
+    directory = Path(directory)
+    vectors = np.load(directory / EMBEDDINGS_FILE, mmap_mode="r")
+    bits = np.lib.format.open_memmap(
+        directory / BITS_FILE, mode="w+", dtype=np.uint8, shape=(len(vectors), (vectors.shape[1] + 7) // 8),
+    )
+    for start in range(0, len(vectors), chunk):
+        bits[start:start + chunk] = pack_signs(np.asarray(vectors[start:start + chunk]))
+    bits.flush()
+
+
+def pack_signs(x: np.ndarray) -> np.ndarray:
+    return np.packbits(np.asarray(x) > 0, axis=-1)
+
+
+if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_LUT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(x: np.ndarray) -> np.ndarray:
+        return _POPCOUNT_LUT[x.view(np.uint8)].reshape(*x.shape, x.itemsize).sum(axis=-1, dtype=np.uint8)
+
+
+def word_major(codes: np.ndarray) -> np.ndarray:
+    """(rows, bytes) packed codes -> (words, rows), the layout :func:`hamming_search` scans."""
+
+    words = np.uint64 if codes.shape[1] % 8 == 0 else np.uint8
+    return np.ascontiguousarray(np.ascontiguousarray(codes).view(words).T)
+
+
+def hamming_search(codes_by_word: np.ndarray, query_codes: np.ndarray, k: int) -> np.ndarray:
+    """Rows of the ``k`` smallest Hamming distances per query (unordered).
+
+    Scanning one word of every row at a time keeps each XOR + popcount on a
+    contiguous array, ~3x faster than reducing across each row's words.
+    """
+
+    query_words = word_major(query_codes).T
+    rows = codes_by_word.shape[1]
+    k = min(k, rows)
+    scratch = np.empty(rows, dtype=codes_by_word.dtype)
+    out = np.empty((len(query_words), k), dtype=np.int64)
+    for i, q in enumerate(query_words):
+        distances = np.zeros(rows, dtype=np.uint16)
+        for word, q_word in zip(codes_by_word, q):
+            np.bitwise_xor(word, q_word, out=scratch)
+            distances += _popcount(scratch)
+        out[i] = np.argpartition(distances, k - 1)[:k]
+    return out
+
+
+def exact_search(matrix: np.ndarray, queries: np.ndarray, k: int, block: int = 32_768) -> tuple[np.ndarray, np.ndarray]:
+    """Top-k rows by inner product; returns (rows, cosine distances) like hnswlib.
+
+    The matrix is processed in row blocks so float16/int8 inputs are only
+    widened to float32 a block at a time.
+    """
+
+    scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+    for start in range(0, len(matrix), block):
+        part = np.asarray(matrix[start:start + block], dtype=np.float32)
+        scores[:, start:start + len(part)] = queries @ part.T
+    k = min(k, len(matrix))
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top, order, axis=1), 1.0 - np.take_along_axis(top_scores, order, axis=1)
+
+
+def rescore(matrix: np.ndarray, queries: np.ndarray, candidates: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Re-rank each query's candidate rows with the full-precision ``matrix``."""
+
+    out_rows, out_distances = [], []
+    for query, rows in zip(queries, candidates):
+        rows = np.sort(rows)  # sequential reads from the memmap
+        scores = np.asarray(matrix[rows], dtype=np.float32) @ query
+        order = np.argsort(-scores)[:k]
+        out_rows.append(rows[order])
+        out_distances.append(1.0 - scores[order])
+    return np.stack(out_rows), np.stack(out_distances)
+
+
+def _swap_in(tmp: Path, target: Path) -> None:
+    old = target.with_name(target.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if target.exists():
+        os.replace(target, old)
+    os.replace(tmp, target)
+    # readers that still have the old files mmapped keep their inodes alive
+    shutil.rmtree(old, ignore_errors=True)
+
+
+class _Snapshot:
+    """One loaded generation of a snapshot directory.
+
+    ``search(queries, k, subset, ef, oversample)`` returns (rows,
+    distances); ``subset`` is the sorted array of rows a ``where`` clause
+    allows, or None for all. ``ef``/``oversample`` are per-query settings
+    that only the modes using them look at.
+    """
+
+    # int8 scan keeps this many candidates per result before the float16 re-rank
+    INT8_OVERSAMPLE = 4
+
+    def __init__(self, directory: Path):
+        self.manifest = json.loads((directory / MANIFEST_FILE).read_text())
+        self.records = RecordStore(directory)
+        self.transform = EmbeddingTransform.load(directory / TRANSFORM_FILE) if "transform" in self.manifest else None
+        self.columns = Columns(directory, len(self.records))
+        self.vectors = np.load(directory / EMBEDDINGS_FILE, mmap_mode="r")
+        self.int8 = np.load(directory / INT8_FILE, mmap_mode="r")
+        self.int8_scales = np.load(directory / INT8_SCALE_FILE)
+
+    def scan(self, queries: np.ndarray, k: int, subset: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k: int8 scan over ``subset`` (or every row), float16 re-rank."""
+
+        # widening int8 is ~8x cheaper than float16 in numpy; the re-rank restores
+        # float16 ordering for the short list
+        codes = self.int8 if subset is None else self.int8[subset]
+        candidates, _ = exact_search(codes, queries * self.int8_scales, k * self.INT8_OVERSAMPLE)
+        if subset is not None:
+            candidates = subset[candidates]
+        return rescore(self.vectors, queries, candidates, k)
+
+
+class _HnswSnapshot(_Snapshot):
+    # A filtered graph walk visits ~ef * rows / len(subset) nodes, each through a
+    # Python callback, while scanning the subset costs ~len(subset); scan when
+    # len(subset)^2 <= FILTER_SCAN_FACTOR * ef * rows (crossover measured at
+    # ~3.5% selectivity on 100k x 768)
+    FILTER_SCAN_FACTOR = 2
+
+    def __init__(self, directory: Path):
+        import hnswlib
+
+        super().__init__(directory)
+        self.index = hnswlib.Index(space="cosine", dim=self.manifest["dim"])
+        self.index.load_index(str(directory / HNSW_FILE))
+        # hnswlib explores max(ef, k) candidates; ef is applied per query through
+        # k (see search()), so the shared index never needs set_ef between queries
+        self.index.set_ef(1)
+        self.index.set_num_threads(1)  # parallelism comes from the Retriever's executor
+
+    def search(self, queries: np.ndarray, k: int, subset: np.ndarray | None = None, ef: int = 64,
+               oversample: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        rows = len(self.records)
+        if subset is not None and len(subset) ** 2 <= self.FILTER_SCAN_FACTOR * ef * rows:
+            return self.scan(queries, k, subset)
+        candidates = min(max(k, ef), rows if subset is None else len(subset))
+        if subset is None:
+            labels, distances = self.index.knn_query(queries, k=candidates)
+            return labels[:, :k], distances[:, :k]
+        allowed = np.zeros(rows, dtype=bool)
+        allowed[subset] = True
+        try:
+            labels, distances = self.index.knn_query(queries, k=candidates, filter=allowed.__getitem__)
+        except RuntimeError:
+            # the walk reached fewer than k allowed rows
+            return self.scan(queries, k, subset)
+        return labels[:, :k], distances[:, :k]
+
+
+class _ExactSnapshot(_Snapshot):
+    # "float32": the float16 vectors widened once at load and kept in RAM (exact, fastest);
+    # "float16": scanned from the mmap and widened per query (exact, no resident copy);
+    # "int8": approximate, see scan()
+    DTYPES = ("float32", "float16", "int8")
+
+    def __init__(self, directory: Path, dtype: str):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unknown exact search dtype '{dtype}'")
+        super().__init__(directory)
+        self.dtype = dtype
+        self.matrix = np.array(self.vectors, dtype=np.float32) if dtype == "float32" else self.vectors
+
+    def search(self, queries: np.ndarray, k: int, subset: np.ndarray | None = None, ef: int | None = None,
+               oversample: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        if self.dtype == "int8":
+            return self.scan(queries, k, subset)
+        if subset is None:
+            return exact_search(self.matrix, queries, k)
+        rows, distances = exact_search(self.matrix[subset], queries, k)
+        return subset[rows], distances
+
+
+class _BinarySnapshot(_Snapshot):
+    def __init__(self, directory: Path):
+        super().__init__(directory)
+        self.codes = word_major(np.load(directory / BITS_FILE))  # in RAM: the hot first stage
+
+    def search(self, queries: np.ndarray, k: int, subset: np.ndarray | None = None, ef: int | None = None,
+               oversample: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        codes = self.codes if subset is None else self.codes[:, subset]
+        candidates = hamming_search(codes, pack_signs(queries), k * oversample)
+        if subset is not None:
+            candidates = subset[candidates]
+        return rescore(self.vectors, queries, candidates, k)
+
+
+class LocalVectorIndex:
+    """Chroma-compatible ``query()`` over a local snapshot.
+
+    ``mode`` is ``"hnsw"`` (approximate, ``ef`` applies) or ``"exact"``
+    (brute force, meant for collections of up to ~100k rows). Exact search
+    scans a float32 copy of the matrix held in RAM (``dtype="float32"``) or
+    the mmapped float16 matrix (``"float16"``); ``"int8"`` is approximate: it
+    scans the int8 copy and re-ranks the top ``4 * k`` rows in float16. ``"binary"`` keeps only the packed sign
+    bits in RAM, takes the ``oversample * k`` nearest rows by Hamming
+    distance and re-ranks them with the memory-mapped float16 vectors.
+    ``ef`` and ``oversample`` are defaults; ``query()`` can override them
+    per call (search profiles, see search/profiles.py).
+
+    With ``generation`` set, a change in the index generation reloads the
+    snapshot on a background thread; queries keep using the previous one
+    until the swap. ``query(..., where=...)`` accepts Chroma's metadata
+    filter syntax for the fields in ``columns.npz``.
+    """
+
+    MODES = ("hnsw", "exact", "binary")
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        ef: int = 64,
+        generation: Callable[[], int] | None = None,
+        mode: str = "hnsw",
+        dtype: str = "float32",
+        oversample: int = 10,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown local index mode '{mode}'")
+        self.directory = Path(directory)
+        self.name = self.directory.name
+        self.ef = ef
+        self.mode = mode
+        self.dtype = dtype
+        self.oversample = oversample
+        self._generation = generation
+        self._loaded_generation = generation() if generation else None
+        self._snapshot = self._load()
+        self._reloading = threading.Lock()
+        self.reloads = 0
+
+    def _load(self) -> _Snapshot:
+        if self.mode == "exact":
+            return _ExactSnapshot(self.directory, self.dtype)
+        if self.mode == "binary":
+            return _BinarySnapshot(self.directory)
+        return _HnswSnapshot(self.directory)
+
+    def count(self) -> int:
+        return len(self._snapshot.records)
+
+    def _maybe_reload(self) -> None:
+        if self._generation is None or self._generation() == self._loaded_generation:
+            return
+        if self._reloading.acquire(blocking=False):
+            threading.Thread(target=self._reload, name=f"local-index-reload-{self.name}", daemon=True).start()
+
+    def _reload(self) -> None:
+        generation = self._generation()
+        try:
+            self._snapshot = self._load()
+            self.reloads += 1
+            logger.info(f"🔄 Local vector index {self.name} reloaded ({self.count()} rows)")
+        except Exception as e:
+            logger.warning(f"Local vector index {self.name} reload failed, keeping previous snapshot: {e}")
+        finally:
+            self._loaded_generation = generation
+            self._reloading.release()
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: dict | None = None,
+        ef: int | None = None,
+        oversample: int | None = None,
+    ) -> dict[str, list]:
+        """Chroma-style query; ``ef``/``oversample`` override the index defaults for this call."""
+
+        self._maybe_reload()
+        snapshot = self._snapshot
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        if snapshot.transform is not None:
+            queries = snapshot.transform.apply(queries)
+        subset = np.flatnonzero(snapshot.columns.mask(where)) if where else None
+        k = min(n_results, len(snapshot.records) if subset is None else len(subset))
+        if k == 0:
+            empty = np.empty((len(queries), 0))
+            return _chroma_result(snapshot.records, empty.astype(np.int64), empty)
+        rows, distances = snapshot.search(
+            queries, k, subset, ef=ef or self.ef, oversample=oversample or self.oversample)
+        return _chroma_result(snapshot.records, rows, distances)
+
+    def stats(self) -> dict[str, object]:
+        manifest = self._snapshot.manifest
+        return {
+            "rows": manifest["count"],
+            "dim": manifest["dim"],
+            "mode": self.mode,
+            "ef": self.ef if self.mode == "hnsw" else None,
+            "dtype": self.dtype if self.mode == "exact" else None,
+            "oversample": self.oversample if self.mode == "binary" else None,
+            "transform": manifest.get("transform"),
+            "columns": manifest.get("columns", []),
+            "built_at": manifest.get("created_at"),
+            "reloads": self.reloads,
+        }
+
+
+def _chroma_result(records: RecordStore, rows: np.ndarray, distances: np.ndarray) -> dict[str, list]:
+    out = {"ids": [], "distances": [], "metadatas": [], "documents": []}
+    for row_ids, row_distances in zip(rows, distances):
+        ids, docs, metas = [], [], []
+        for row in row_ids:
+            record_id, document, metadata = records.get(int(row))
+            ids.append(record_id)
+            docs.append(document)
+            metas.append(metadata)
+        out["ids"].append(ids)
+        out["documents"].append(docs)
+        out["metadatas"].append(metas)
+        out["distances"].append([float(d) for d in row_distances])
+    return out
+
+
+def export_and_build(collection, out_root: Path | None = None, reduce: str | None = None, **hnsw_options) -> dict:
+    """Export ``collection`` with its int8/binary copies and HNSW index; used by step 6.
+
+    ``reduce`` (e.g. ``"pca:256"``) fits a transform and stores only the
+    reduced vectors. Everything is written to ``<collection>.tmp`` and
+    swapped in at the end, so a reader never opens a half-written snapshot.
+    """
+
+    target = (out_root or local_index_dir()) / collection.name
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    export_collection(collection, tmp)
+    spec = parse_spec(reduce)
+    if spec is not None:
+        reduce_embeddings(tmp, *spec)
+    write_int8(tmp)
+    write_bits(tmp)
+    manifest = build_hnsw(tmp, **hnsw_options)
+    _swap_in(tmp, target)
+    return manifest
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Export Chroma collections to local vector index snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="export a collection from the configured Chroma server")
+    export.add_argument("--collection", action="append", required=True)
+    export.add_argument("--out", type=Path, default=None, help="defaults to local_index_dir()")
+    export.add_argument("--m", type=int, default=32)
+    export.add_argument("--ef-construction", type=int, default=200)
+    export.add_argument("--reduce", default=os.getenv("LOCAL_INDEX_REDUCE"), help="e.g. pca:256 or truncate:384")
+    args = parser.parse_args(argv)
+
+    from app.services.indexing.chroma_indexer import ChromaIndexer
+
+    indexer = ChromaIndexer()
+    for name in args.collection:
+        manifest = export_and_build(
+            indexer.get_collection(name), args.out, reduce=args.reduce, m=args.m, ef_construction=args.ef_construction,
+        )
+        print(f"✅ Exported {name}: {manifest['count']} rows, dim {manifest['dim']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Dynamic micro-batching in front of a batch-capable encoder."""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Sequence
+
+import numpy as np
+
+
+class MicroBatchEncoder:
+    """Coalesces concurrent single-query encodes into one forward pass.
+
+    Callers block in :meth:`encode`. A worker thread takes the first pending
+    query together with whatever else is already queued. A query that arrives
+    alone while the encoder is otherwise idle (the previous batch was a single
+    query too) is encoded at once; under concurrent load the worker keeps
+    collecting for up to ``window_ms`` (or until ``max_batch`` are queued).
+    It then runs ``encode_batch`` once and resolves every caller's future.
+    Identical texts within a batch are encoded once.
+    """
+
+    def __init__(
+        self,
+        encode_batch: Callable[[Sequence[str]], np.ndarray],
+        window_ms: float = 3.0,
+        max_batch: int = 16,
+    ):
+        if max_batch <= 0:
+            raise ValueError("max_batch must be positive")
+        self.encode_batch = encode_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue[tuple[str, Future] | None] = queue.SimpleQueue()
+        self._closed = False
+        self.batches = 0
+        self.queries = 0
+        self.immediate = 0  # batches dispatched without waiting for the window
+        self._last_batch = 0
+        self.max_batch_seen = 0
+        self._worker = threading.Thread(target=self._run, name="micro-batch-encoder", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        if self._closed:
+            raise RuntimeError("MicroBatchEncoder is closed")
+        fut: Future = Future()
+        self._queue.put((text, fut))
+        return fut
+
+    def encode(self, text: str, timeout: float | None = None) -> np.ndarray:
+        return self.submit(text).result(timeout=timeout)
+
+    def close(self) -> None:
+        self._closed = True
+        self._queue.put(None)
+
+    def _collect(self, first: tuple[str, Future]) -> tuple[list[tuple[str, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        if len(batch) == 1 and self._last_batch <= 1:
+            # nothing else in flight: waiting would only add latency
+            self.immediate += 1
+            return batch, False
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            self._last_batch = len(batch)
+            batch = [(text, fut) for text, fut in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = np.asarray(self.encode_batch(texts), dtype=np.float32)
+            except BaseException as exc:  # hand the failure to every waiter
+                for _, fut in batch:
+                    fut.set_exception(exc)
+                continue
+
+            by_text = dict(zip(texts, vectors))
+            for text, fut in batch:
+                fut.set_result(by_text[text])
+
+            self.batches += 1
+            self.queries += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+        # fail anything still queued after close()
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].set_exception(RuntimeError("MicroBatchEncoder is closed"))
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch": round(self.queries / self.batches, 2) if self.batches else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "immediate": self.immediate,
+        }
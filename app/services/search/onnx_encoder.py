@@ -0,0 +1,132 @@
+"""ONNX Runtime (int8) backend for the bge query encoder.
+
+Export once with requirements/onnx_export.txt (torch) installed, then serve
+with only requirements/onnx.txt (onnxruntime + tokenizers):
+
+    python -m app.services.search.onnx_encoder export --out models/bge-base-en-v1.5-int8
+
+At runtime set QUERY_ENCODER_BACKEND=onnx and ONNX_MODEL_DIR to that folder.
+``docker build --build-arg QUERY_ENCODER_BACKEND=onnx`` does both, leaving
+torch out of the image.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+class OnnxQueryEncoder:
+    """Drop-in replacement for ``FlagModel.encode`` backed by onnxruntime.
+
+    Matches FlagModel's defaults for bge: CLS pooling followed by L2
+    normalisation. A single string returns a 1-d vector, a list returns a
+    2-d array.
+    """
+
+    def __init__(
+        self,
+        model_dir: str | os.PathLike,
+        quantized: bool = True,
+        max_length: int = 512,
+        intra_op_threads: int = 0,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        model_path = model_dir / (QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        if not model_path.exists():
+            raise FileNotFoundError(f"ONNX model not found at {model_path}; run the export command first")
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, sentences: str | Sequence[str]) -> np.ndarray:
+        single = isinstance(sentences, str)
+        batch = [sentences] if single else list(sentences)
+        encodings = self.tokenizer.encode_batch(batch)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        last_hidden_state = self.session.run(None, feeds)[0]
+        cls = last_hidden_state[:, 0]
+        cls = cls / np.linalg.norm(cls, axis=1, keepdims=True)
+        cls = cls.astype(np.float32)
+        return cls[0] if single else cls
+
+
+def export(model_name: str, out_dir: str | os.PathLike, opset: int = 17) -> Path:
+    """Export ``model_name`` to ONNX and write a dynamically int8-quantized copy."""
+
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(out_dir)
+
+    sample = tokenizer(["warm up query"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(out_dir / MODEL_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    quantize_dynamic(
+        str(out_dir / MODEL_FILE),
+        str(out_dir / QUANTIZED_MODEL_FILE),
+        weight_type=QuantType.QInt8,
+    )
+    return out_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ONNX query encoder tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="export + int8-quantize the query encoder")
+    exp.add_argument("--model", default="BAAI/bge-base-en-v1.5")
+    exp.add_argument("--out", required=True)
+    exp.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        path = export(args.model, args.out, opset=args.opset)
+        print(f"✅ Exported {args.model} to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Search-quality profiles: per-request recall vs latency for the vector legs.
+
+HNSW search explores ``max(ef, k)`` candidates (hnswlib, and Chroma on
+top of it), so a profile's ``ef_search`` is applied per request as a floor
+on the candidate count: the vector backend is asked for
+``max(n_results, ef_search)`` neighbours and the list is cut back to
+``n_results``. That needs no per-query index state, so concurrent requests
+with different profiles never race on a shared ``set_ef``. ``oversample``
+is the first-stage multiplier of the binary local mode; exact search
+ignores both.
+
+Chroma has no per-query ``ef_search`` and already explores ``n_results``
+candidates when that exceeds its configured ``ef_search`` (the Retriever
+asks for ``2 * top_k``), so a floor alone cannot make it faster. On Chroma a
+profile's ``depth`` scales the number of neighbours requested instead:
+``fast`` asks for ``SEARCH_DEPTH_FAST`` (0.5) x ``n_results``, still floored
+at its ``ef_search``, and returns fewer semantic hits for fusion. The local
+backends honour ``ef_search``/``oversample`` per query and ignore ``depth``.
+
+``None`` means "the backend's configured default" (the Chroma collection's
+``ef_search``, ``LOCAL_INDEX_EF``, ``LOCAL_BINARY_OVERSAMPLE``), which is
+what ``balanced`` uses unless overridden. Pick values with
+``python -m benchmarks.hnsw_sweep``.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from typing import Literal, NamedTuple
+
+ProfileName = Literal["fast", "balanced", "exhaustive"]
+
+
+def _env_int(name: str, default: int | None) -> int | None:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def _env_float(name: str, default: float | None) -> float | None:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return float(value)
+
+
+class SearchProfile(NamedTuple):
+    name: str
+    ef_search: int | None
+    oversample: int | None
+    depth: float | None = None
+
+    @property
+    def is_default(self) -> bool:
+        return self.ef_search is None and self.oversample is None and self.depth is None
+
+    def candidates(self, n_results: int) -> int:
+        """Neighbours to request from Chroma for ``n_results`` hits (see module docstring)."""
+
+        wanted = max(1, math.ceil(n_results * self.depth)) if self.depth is not None else n_results
+        return max(wanted, self.ef_search or 0)
+
+
+PROFILES: dict[str, SearchProfile] = {
+    "fast": SearchProfile(
+        "fast", _env_int("SEARCH_EF_FAST", 16), _env_int("SEARCH_OVERSAMPLE_FAST", 4),
+        _env_float("SEARCH_DEPTH_FAST", 0.5)),
+    "balanced": SearchProfile(
+        "balanced", _env_int("SEARCH_EF_BALANCED", None), _env_int("SEARCH_OVERSAMPLE_BALANCED", None)),
+    "exhaustive": SearchProfile(
+        "exhaustive", _env_int("SEARCH_EF_EXHAUSTIVE", 256), _env_int("SEARCH_OVERSAMPLE_EXHAUSTIVE", 40)),
+}
+
+DEFAULT_PROFILE = os.getenv("SEARCH_PROFILE", "balanced")
+
+
+def get_profile(name: str | None = None) -> SearchProfile:
+    name = name or DEFAULT_PROFILE
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown search profile '{name}', expected one of {', '.join(PROFILES)}") from None
+
+
+def truncate_results(results: dict[str, list], n_results: int) -> dict[str, list]:
+    """Cut every query row of a Chroma-shaped result back to ``n_results`` hits."""
+
+    return {
+        key: [row[:n_results] for row in rows] if isinstance(rows, list) and rows and isinstance(rows[0], list) else rows
+        for key, rows in results.items()
+    }
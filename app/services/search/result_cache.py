@@ -0,0 +1,106 @@
+"""LRU cache of fused search results, scoped to an index generation."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from app.services.search.embedding_cache import normalize_query
+
+
+class SearchResultCache:
+    """Caches final hybrid_search output.
+
+    Keys are (normalized query, top_k, filters, generation). When a lookup
+    sees a different generation (newer, or lower after the generation file was
+    reset) every entry is dropped, so a reindex never serves stale hits;
+    results computed for any other generation are not stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, tuple[Any, ...]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.generation_resets = 0  # generation went down (file deleted or reset)
+
+    @staticmethod
+    def key(query_text: str, top_k: int, filters: dict | None, generation: int) -> tuple:
+        filters_key = json.dumps(filters, sort_keys=True, default=str) if filters else ""
+        return (normalize_query(query_text), int(top_k), filters_key, generation)
+
+    def _sync_generation(self, generation: int) -> None:
+        """Switch to ``generation``, dropping every entry of the previous one."""
+
+        # caller holds the lock. Any change invalidates, including a lower number:
+        # read_generation() returns 0 when the file is deleted or reset
+        if self._generation == generation:
+            return
+        if self._generation is not None and generation < self._generation:
+            self.generation_resets += 1
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self._generation = generation
+
+    def get(self, key: tuple) -> list | None:
+        now = self._clock()
+        with self._lock:
+            self._sync_generation(key[-1])
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, results = entry
+            if self.ttl_seconds and now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return list(results)
+
+    def put(self, key: tuple, results: list) -> None:
+        now = self._clock()
+        with self._lock:
+            if self._generation is None:
+                self._sync_generation(key[-1])
+            elif key[-1] != self._generation:
+                # computed against an index that has since been replaced
+                return
+            self._entries[key] = (now, tuple(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "generation": self._generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "generation_resets": self.generation_resets,
+        }
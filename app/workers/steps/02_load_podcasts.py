@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-import asyncio
 import json
 
 from tqdm import tqdm
 
+from app.db.session import run_async
 from app.services.podcasts import save_podcast
 from app.services.storage import Storage
 from app.workers import dagmatic
@@ -49,7 +49,7 @@ def _run(ctx: dagmatic.StepContext) -> dagmatic.StepResult:  # noqa: ARG001
     if not podcasts:
         return dagmatic.StepResult.failed("Podcast metadata list is empty")
 
-    succeeded, failures = asyncio.run(_persist_podcasts(podcasts))
+    succeeded, failures = run_async(_persist_podcasts(podcasts))
 
     if failures:
         # Surface the failed podcast IDs without leaking full payloads.
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import asyncio
 from collections import defaultdict
 from typing import Any, Dict, List
 
@@ -12,7 +11,7 @@ from sqlalchemy.orm import selectinload
 
 from app.db.data_models.episode import Episode
 from app.db.data_models.transcript import Transcript
-from app.db.session import AsyncSessionLocal
+from app.db.session import AsyncSessionLocal, run_async
 from app.language_models.question_detector.src.infer import InferenceModel
 from app.workers import dagmatic
 
@@ -34,7 +33,7 @@ def _run(ctx: dagmatic.StepContext) -> dagmatic.StepResult:  # noqa: ARG001
 	"""Detect and persist host questions and QA pairs for each episode."""
 
 	try:
-		summary = asyncio.run(_classify_and_save())
+		summary = run_async(_classify_and_save())
 	except Exception as exc:  # pragma: no cover - surfaced to CLI
 		return dagmatic.StepResult.failed(f"Failed classifying host questions: {exc}")
 
@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
-import asyncio
+import os
 from typing import Any, Dict
 
+from app.db.session import run_async
 from app.services.indexing.chroma_indexer import ChromaIndexer
+from app.services.search.index_generation import bump_generation
 from app.workers import dagmatic
 
 
@@ -24,10 +26,13 @@ def _run(ctx: dagmatic.StepContext) -> dagmatic.StepResult:  # noqa: ARG001
 	"""Create/update Chroma collections for QA pairs and utterances."""
 
 	try:
-		summary = asyncio.run(_index_collections())
+		summary = run_async(_index_collections())
 	except Exception as exc:  # pragma: no cover - surfaced to CLI
 		return dagmatic.StepResult.failed(f"Failed indexing Chroma collections: {exc}")
 
+	# Let running API instances drop results cached against the old index
+	summary["index_generation"] = bump_generation("step6_index_chroma")
+
 	message = (
 		f"Chroma QA docs={summary['qa_count']} (Δ {summary['qa_delta']}) | "
 		f"Utterances={summary['utterance_count']} (Δ {summary['utterance_delta']})"
@@ -39,24 +44,55 @@ def _run(ctx: dagmatic.StepContext) -> dagmatic.StepResult:  # noqa: ARG001
 async def _index_collections() -> Dict[str, Any]:
 	indexer = ChromaIndexer()
 
-	qa_before = _collection_count(indexer, indexer.qa_collection_name)
-	await indexer.upsert_qa_collection()
-	qa_after = _collection_count(indexer, indexer.qa_collection_name)
+	try:
+		qa_before = _collection_count(indexer, indexer.qa_collection_name)
+		qa_dedup = await indexer.upsert_qa_collection()
+		qa_after = _collection_count(indexer, indexer.qa_collection_name)
+
+		utter_before = _collection_count(indexer, indexer.utterances_collection_name)
+		utterance_writes = await indexer.upsert_utterances_collection()
+		utter_after = _collection_count(indexer, indexer.utterances_collection_name)
+	finally:
+		await indexer.aclose()
 
-	utter_before = _collection_count(indexer, indexer.utterances_collection_name)
-	await indexer.upsert_utterances_collection()
-	utter_after = _collection_count(indexer, indexer.utterances_collection_name)
+	local_index = None
+	if os.getenv("VECTOR_BACKEND", "chroma").lower() == "local":
+		local_index = _export_local_index(indexer)
 
 	return {
 		"qa_collection": indexer.qa_collection_name,
 		"qa_count": qa_after,
 		"qa_delta": qa_after - qa_before,
+		"qa_dedup": qa_dedup,
 		"utterance_collection": indexer.utterances_collection_name,
 		"utterance_count": utter_after,
 		"utterance_delta": utter_after - utter_before,
+		"utterance_writes": utterance_writes,
+		"embedding_cache": indexer.embedding_cache.stats() if indexer.embedding_cache else None,
+		"embedding_retries": indexer.embeddings_generator.retries,
+		"ledger": {
+			name: indexer.ledger.stats(name)
+			for name in (indexer.qa_collection_name, indexer.utterances_collection_name)
+		},
+		"local_index": local_index,
 	}
 
 
+def _export_local_index(indexer: ChromaIndexer) -> Dict[str, Any]:
+	"""Snapshot both collections for API instances running VECTOR_BACKEND=local."""
+
+	from app.services.search.local_index import export_and_build, local_index_dir
+
+	exported = {}
+	for name in (indexer.qa_collection_name, indexer.utterances_collection_name):
+		manifest = export_and_build(
+			indexer.chroma_client.get_collection(name),
+			reduce=os.getenv("LOCAL_INDEX_REDUCE") or None,
+		)
+		exported[name] = manifest["count"]
+	return {"path": str(local_index_dir()), "rows": exported}
+
+
 def _collection_count(indexer: ChromaIndexer, collection_name: str) -> int:
 	if not collection_name:
 		return 0
@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-import asyncio
 from typing import Any, Dict
 
+from app.db.session import run_async
 from app.services.indexing.elasticsearch_indexer import ESIndexer
+from app.services.search.index_generation import bump_generation
 from app.workers import dagmatic
 
 
@@ -24,10 +25,13 @@ def _run(ctx: dagmatic.StepContext) -> dagmatic.StepResult:  # noqa: ARG001
     """Create/update the Elasticsearch utterance index."""
 
     try:
-        summary = asyncio.run(_index_elasticsearch())
+        summary = run_async(_index_elasticsearch())
     except Exception as exc:  # pragma: no cover - surfaced to CLI
         return dagmatic.StepResult.failed(f"Failed indexing Elasticsearch: {exc}")
 
+    # Let running API instances drop results cached against the old index
+    summary["index_generation"] = bump_generation("step7_index_elasticsearch")
+
     message = (
         f"ES utterances indexed={summary['successes']} (failures={summary['failures']})"
     )
@@ -2,12 +2,12 @@
 
 from __future__ import annotations
 
-import asyncio
 import json
 from pathlib import Path
 
 from tqdm import tqdm
 
+from app.db.session import run_async
 from app.services.podcasts import save_episodes
 from app.services.storage import Storage
 from app.workers import dagmatic
@@ -50,7 +50,7 @@ def _run(ctx: dagmatic.StepContext) -> dagmatic.StepResult:  # noqa: ARG001
     if not episodes:
         return dagmatic.StepResult.failed("Episode metadata list is empty")
 
-    succeeded, failures = asyncio.run(save_episodes(episodes))
+    succeeded, failures = run_async(save_episodes(episodes))
 
     if failures:
         # Surface the failed episode IDs without leaking full payloads.
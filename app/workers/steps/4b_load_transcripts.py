@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-import asyncio
 import json
 import os
 from pathlib import Path
 
+from app.db.session import run_async
 from app.services.podcasts import save_transcripts
 from app.workers import dagmatic
 
@@ -50,7 +50,7 @@ def _run(ctx: dagmatic.StepContext) -> dagmatic.StepResult:  # noqa: ARG001
     if not transcripts:
         return dagmatic.StepResult.failed(f"No transcript json files found in {TRANSCRIPTS_DIR}")
 
-    asyncio.run(save_transcripts(transcripts))
+    run_async(save_transcripts(transcripts))
 
     return dagmatic.StepResult.ok(
         message=f"Loaded {len(transcripts)} transcripts into the database",
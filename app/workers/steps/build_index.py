@@ -1,7 +1,7 @@
 import chromadb
 from app.services.indexing.chroma_indexer import ChromaIndexer
 from app.services.indexing.elasticsearch_indexer import ESIndexer
-import asyncio
+from app.db.session import run_async
 
 chroma_client = chromadb.HttpClient(host="localhost", port=8000)
 
@@ -10,6 +10,7 @@ async def chroma():
     indexer = ChromaIndexer()
     await indexer.upsert_qa_collection()
     await indexer.upsert_utterances_collection()
+    await indexer.aclose()
 
     # import pprint
     # pprint.pprint(all_episodes[0])
@@ -32,7 +33,7 @@ async def elasticsearch():
     # response = es_indexer.search(index_name="test_index", query={"query": {"match_all": {}}})
     # print(response)
 if __name__ == "__main__":
-    asyncio.run(chroma())
-    asyncio.run(elasticsearch())
+    run_async(chroma())
+    run_async(elasticsearch())
 
     
\ No newline at end of file
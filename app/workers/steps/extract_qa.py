@@ -3,7 +3,7 @@
 import asyncio
 from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
-from app.db.session import AsyncSessionLocal
+from app.db.session import AsyncSessionLocal, run_async
 from app.db.data_models.episode import Episode
 from app.db.data_models.transcript import Transcript
 from app.language_models.question_detector.src.infer import InferenceModel
@@ -121,8 +121,8 @@ async def get_episode_data():
 
 # # print(f"Extracted a total of host {len(all_questions)} questions from {len(transcript_files[:1])} transcripts.")
 if __name__ == "__main__":
-    # asyncio.run(get_episode_data())
-    asyncio.run(main())
+    # run_async(get_episode_data())
+    run_async(main())
 
 
 # total questions:  5333
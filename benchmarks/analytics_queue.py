@@ -0,0 +1,63 @@
+"""Offline load test for the API analytics queue.
+
+Pushes events as fast as possible into an AnalyticsQueue backed by a
+LocalSink with artificial latency, then reports producer-side enqueue
+latency (what the request path pays) and how many events were sent,
+sampled out or dropped.
+
+    python -m benchmarks.analytics_queue --events 200000 --sink-latency-ms 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from app.api.analytics import AnalyticsQueue, LocalSink
+
+
+async def _run(args) -> None:
+    sink = LocalSink(latency_ms=args.sink_latency_ms)
+    queue = AnalyticsQueue(
+        sink,
+        max_size=args.queue_size,
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        sample_rate=args.sample_rate,
+    )
+    queue.start()
+
+    latencies = []
+    started = time.perf_counter()
+    for i in range(args.events):
+        t0 = time.perf_counter_ns()
+        queue.capture("api_request", distinct_id=f"user-{i % 100}", properties={"path": "/search", "i": i})
+        latencies.append(time.perf_counter_ns() - t0)
+        if i % args.yield_every == 0:
+            await asyncio.sleep(0)  # let the flusher run, like a busy event loop would
+    produce_s = time.perf_counter() - started
+    await queue.stop(timeout=30)
+
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] / 1000.0  # noqa: E731
+    print(f"events={args.events} in {produce_s:.2f}s ({args.events / produce_s:,.0f}/s)")
+    print(f"enqueue latency µs: p50={p(0.5):.2f} p99={p(0.99):.2f} max={latencies[-1] / 1000.0:.2f}")
+    print(f"queue stats: {queue.stats()}")
+    print(f"sink received: {sink.events} events in {sink.batches} batches")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--sink-latency-ms", type=float, default=50.0)
+    parser.add_argument("--queue-size", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    parser.add_argument("--yield-every", type=int, default=50)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
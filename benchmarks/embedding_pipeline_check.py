@@ -0,0 +1,77 @@
+"""Failure handling of the indexing embed → write pipeline.
+
+Runs ``run_pipeline`` with fake embed/write callables: a clean run, an
+embedding request that fails for good, and writes that fail early and late
+(after every batch is embedded, with the queue full). Each run must finish
+within a timeout and surface the right exception instead of hanging.
+
+    python -m benchmarks.embedding_pipeline_check
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+
+from app.services.indexing.embedding_pipeline import run_pipeline
+
+BATCHES = 8
+CONCURRENCY = 2
+TIMEOUT = 3.0
+
+
+class Boom(Exception):
+    pass
+
+
+async def run_case(embed_fails: int | None = None, write_fails: int | None = None,
+                   write_delay: float = 0.0) -> tuple[type[BaseException] | None, list[int]]:
+    written: list[int] = []
+
+    async def embed(batch):
+        await asyncio.sleep(0.001)
+        if batch[0] == embed_fails:
+            raise Boom(f"embed {batch[0]}")
+        return batch
+
+    async def write(batch, embeddings):
+        await asyncio.sleep(write_delay)
+        if batch[0] == write_fails:
+            raise Boom(f"write {batch[0]}")
+        written.append(batch[0])
+
+    try:
+        await asyncio.wait_for(
+            run_pipeline([[i] for i in range(BATCHES)], embed, write, concurrency=CONCURRENCY), TIMEOUT)
+    except BaseException as e:
+        return type(e), written
+    return None, written
+
+
+CASES = [
+    ("clean run", {}, None),
+    ("embed fails", {"embed_fails": 3}, Boom),
+    ("write fails early", {"write_fails": 1}, Boom),
+    # writes are slower than embeds: the embedders are done and the queue is full
+    ("write fails late", {"write_fails": 5, "write_delay": 0.02}, Boom),
+    ("last write fails", {"write_fails": BATCHES - 1, "write_delay": 0.02}, Boom),
+]
+
+
+async def main() -> None:
+    failures = 0
+    for label, kwargs, expected in CASES:
+        error, written = await run_case(**kwargs)
+        ok = error is expected
+        if expected is None:
+            ok = ok and sorted(written) == list(range(BATCHES))
+        failures += not ok
+        name = error.__name__ if error else "no error"
+        print(f"{'✅' if ok else '❌'} {label:<18} -> {name}, {len(written)}/{BATCHES} batches written")
+    if failures:
+        sys.exit(f"❌ {failures} pipeline cases failed")
+    print("✅ pipeline failures surface without hanging")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
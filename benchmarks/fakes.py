@@ -0,0 +1,275 @@
+"""In-process stand-ins for the search backends used by the benchmarks.
+
+They implement just the surface the Retriever touches (Chroma collection
+``query()``, Elasticsearch ``search()`` / ``msearch()``, ``encode()``) with
+configurable latency distributions and a synthetic corpus, so the API can be
+load-tested on any Linux box without Chroma, ES or torch.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.search.episode_metadata import EpisodeMetadata
+from app.services.search.filters import QA_RANGE_UPPER, filter_attributes
+
+_WORDS = (
+    "career manager engineer startup hiring story funny advice burnout writing "
+    "promotion meta google interview product design leadership regret team "
+    "equity founder remote learning mentor feedback conflict deadline launch"
+).split()
+
+
+class LatencyModel:
+    """Log-normal latency parameterised by median and p99 (ms); "8:25" style spec."""
+
+    def __init__(self, median_ms: float, p99_ms: float | None = None):
+        self.median = median_ms / 1000.0
+        p99 = (p99_ms if p99_ms is not None else median_ms) / 1000.0
+        self.sigma = math.log(p99 / self.median) / 2.326 if p99 > self.median > 0 else 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        median, _, p99 = spec.partition(":")
+        return cls(float(median), float(p99) if p99 else None)
+
+    def sleep(self) -> None:
+        if self.median <= 0:
+            return
+        time.sleep(self.median * math.exp(self.sigma * random.gauss(0.0, 1.0)))
+
+
+def unit_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    m = rng.standard_normal((n, dim), dtype=np.float32)
+    m /= np.linalg.norm(m, axis=1, keepdims=True)
+    return m
+
+
+_HITS_PER_EPISODE = 50
+_EPISODES_PER_PODCAST = 10
+_FIRST_EPISODE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _synthetic_episode(e: int) -> tuple[str, datetime, int]:
+    """(podcast_id, date_published, duration) of synthetic episode ``e``."""
+
+    return str(e // _EPISODES_PER_PODCAST), _FIRST_EPISODE + timedelta(days=e), 1200 + 300 * (e % 12)
+
+
+def synthetic_corpus(n: int, seed: int = 0, qa: bool = False) -> tuple[list[str], list[dict]]:
+    """Slim index documents, as written by the indexers (see episode_metadata.py)."""
+
+    rng = random.Random(seed)
+    docs, metas = [], []
+    for i in range(n):
+        text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(12, 40)))
+        docs.append(json.dumps({"question": text[:80], "answer": text}) if qa else text)
+        meta = {
+            "episode_id": str(100000 + i // _HITS_PER_EPISODE),
+            **filter_attributes(*_synthetic_episode(i // _HITS_PER_EPISODE)),
+            "start": float(i * 1000),
+            "end": float(i * 1000 + 15000),
+        }
+        if qa:
+            # one posting per synthetic QA vector: its range envelope is the value itself
+            meta.update({upper: meta[field] for field, upper in QA_RANGE_UPPER.items()})
+        else:
+            meta["speaker"] = "AB"[i % 2]
+        metas.append(meta)
+    return docs, metas
+
+
+def synthetic_episodes(corpus_size: int) -> dict[str, EpisodeMetadata]:
+    """Episode table matching :func:`synthetic_corpus`, for ``Retriever(episode_loader=...)``."""
+
+    episodes = {}
+    for e in range(corpus_size // _HITS_PER_EPISODE + 1):
+        podcast_id, published, duration = _synthetic_episode(e)
+        episodes[str(100000 + e)] = EpisodeMetadata(
+            title=f"Episode {e}",
+            podcast_title=f"Podcast {podcast_id}",
+            description="Synthetic episode description " * 4,
+            author="Benchmark Host",
+            date_published=published.replace(tzinfo=None).isoformat(),
+            duration=duration,
+            enclosure_url=f"https://example.invalid/{e}.mp3",
+            episode_image="",
+            podcast_url="",
+        )
+    return episodes
+
+
+def chroma_where_matches(metadata: dict, where: dict | None) -> bool:
+    """The subset of Chroma's ``where`` semantics that SearchFilters produces."""
+
+    if not where:
+        return True
+    if "$and" in where:
+        return all(chroma_where_matches(metadata, clause) for clause in where["$and"])
+    for field, condition in where.items():
+        value = metadata.get(field)
+        for op, operand in condition.items():
+            if value is None:
+                return False
+            if op == "$in" and value not in operand:
+                return False
+            if op == "$gte" and not value >= operand:
+                return False
+            if op == "$lte" and not value <= operand:
+                return False
+    return True
+
+
+def es_filter_matches(source: dict, clauses: list[dict]) -> bool:
+    for clause in clauses:
+        (kind, spec), = clause.items()
+        (field, condition), = spec.items()
+        value = source.get(field)
+        if value is None:
+            return False
+        if kind == "terms" and value not in condition:
+            return False
+        if kind == "range" and not (condition.get("gte", value) <= value <= condition.get("lte", value)):
+            return False
+    return True
+
+
+class FakeCollection:
+    """Exact cosine search over a synthetic corpus, plus simulated network latency."""
+
+    def __init__(self, name: str, size: int, dim: int, latency: LatencyModel, seed: int = 0):
+        self.name = name
+        self.latency = latency
+        self.embeddings = unit_vectors(size, dim, seed)
+        self.documents, self.metadatas = synthetic_corpus(size, seed, qa=name == "qa")
+        self.ids = [f"{name}-{i}" for i in range(size)]
+        self._masks: dict[str, np.ndarray] = {}  # where -> allowed rows, like an engine's filter cache
+
+    def _allowed(self, where: dict) -> np.ndarray:
+        key = json.dumps(where, sort_keys=True)
+        if key not in self._masks:
+            self._masks[key] = np.array([chroma_where_matches(m, where) for m in self.metadatas])
+        return self._masks[key]
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def query(self, query_embeddings, n_results=10, where=None, **_):
+        self.latency.sleep()
+        q = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        allowed = self._allowed(where) if where else None
+        scores = q @ self.embeddings.T
+        if allowed is not None:
+            scores[:, ~allowed] = -np.inf
+        k = min(n_results, scores.shape[1] if allowed is None else int(allowed.sum()))
+        out = {"ids": [], "distances": [], "metadatas": [], "documents": []}
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k] if k else np.empty(0, dtype=np.int64)
+            top = top[np.argsort(-row[top])]
+            out["ids"].append([self.ids[i] for i in top])
+            out["distances"].append([float(1.0 - row[i]) for i in top])
+            out["metadatas"].append([self.metadatas[i] for i in top])
+            out["documents"].append([self.documents[i] for i in top])
+        return out
+
+
+class FakeChromaIndexer:
+    def __init__(self, size: int, dim: int, latency: LatencyModel):
+        self.chroma_client = SimpleNamespace(heartbeat=lambda: time.time_ns())
+        self._collections = {
+            "episode_qa_pairs": FakeCollection("qa", max(1, size // 10), dim, latency, seed=1),
+            "utterances": FakeCollection("utt", size, dim, latency, seed=2),
+        }
+
+    def get_collection(self, name):
+        return self._collections[name]
+
+
+class FakeElasticsearch:
+    """Returns pseudo-random keyword hits from the synthetic corpus."""
+
+    def __init__(self, size: int, latency: LatencyModel):
+        self.latency = latency
+        self.documents, self.metadatas = synthetic_corpus(size, seed=3)
+        self._pools: dict[str, list[int]] = {}
+
+    def _pool(self, clauses: list[dict]) -> list[int]:
+        key = json.dumps(clauses, sort_keys=True)
+        if key not in self._pools:
+            self._pools[key] = [i for i, m in enumerate(self.metadatas) if es_filter_matches(m, clauses)]
+        return self._pools[key]
+
+    def _hits(self, body):
+        size = body.get("size", 10)
+        query = body["query"]
+        clauses = []
+        if "bool" in query:
+            clauses = query["bool"].get("filter", [])
+            query = query["bool"]["must"]
+        rng = random.Random(query["multi_match"]["query"])
+        pool = self._pool(clauses) if clauses else range(len(self.documents))
+        picks = rng.sample(pool, min(size, len(pool)))
+        return {"hits": {"hits": [
+            {"_id": str(i), "_score": 10.0 / (rank + 1), "_source": {**self.metadatas[i], "text": self.documents[i]}}
+            for rank, i in enumerate(picks)
+        ]}}
+
+    def search(self, index=None, body=None, **_):
+        self.latency.sleep()
+        return self._hits(body)
+
+    def msearch(self, body=None, **_):
+        self.latency.sleep()
+        return {"responses": [self._hits(b) for b in body[1::2]]}
+
+    def ping(self, **_):
+        return True
+
+
+class FakeESIndexer:
+    def __init__(self, size: int, latency: LatencyModel):
+        self.es = FakeElasticsearch(size, latency)
+
+    def get_client(self):
+        return self.es
+
+    def assert_connection(self):
+        return True
+
+    def pool_stats(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeEncoder:
+    """CPU-encoder stand-in: one forward pass at a time, fixed + per-item cost."""
+
+    def __init__(self, call_ms: float = 12.0, item_ms: float = 1.5, dim: int = 768):
+        self.call = call_ms / 1000.0
+        self.item = item_ms / 1000.0
+        self.dim = dim
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        v = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return v / np.linalg.norm(v)
+
+    def encode(self, texts):
+        batch = [texts] if isinstance(texts, str) else list(texts)
+        with self._lock:
+            time.sleep(self.call + self.item * len(batch))
+        out = np.stack([self._vector(t) for t in batch])
+        return out[0] if isinstance(texts, str) else out
@@ -0,0 +1,131 @@
+"""Sweep HNSW M / ef_search: recall@k against brute force vs query latency.
+
+Builds one hnswlib cosine index per ``--m`` (the library under both Chroma
+and the local backend; Chroma calls M ``max_neighbors``) and queries it at
+every ``--ef``. Ground truth is an exact float32 top-k over the same
+embeddings. Prints recall@k, p50/p99 per query (single thread, like one
+executor slot in the Retriever), build time and graph size, then the
+cheapest setting that reaches each ``--target`` recall; use those to set
+the ``fast``/``balanced``/``exhaustive`` profiles (SEARCH_EF_*) and
+CHROMA_HNSW_M / CHROMA_EF_SEARCH.
+
+    python -m benchmarks.hnsw_sweep                                  # synthetic, bge-sized
+    python -m benchmarks.hnsw_sweep --rows 200000 --m 16 32 --ef 16 32 64 128 256
+    python -m benchmarks.hnsw_sweep --snapshot data/vector_index/utterances --queries 500
+
+With ``--snapshot`` the vectors come from a local snapshot's
+``embeddings.npy``; ``--queries`` rows are held out of the index and used
+as queries.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services.search import local_index
+from app.services.search.local_index import normalize_rows
+from benchmarks.vector_backends import synthetic_embeddings
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int, block: int = 256) -> np.ndarray:
+    truth = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), block):
+        scores = queries[start:start + block] @ corpus.T
+        truth[start:start + block] = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return truth
+
+
+def snapshot_embeddings(directory: Path, queries: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    vectors = normalize_rows(np.load(directory / local_index.EMBEDDINGS_FILE, mmap_mode="r"))
+    held_out = np.zeros(len(vectors), dtype=bool)
+    held_out[np.random.default_rng(seed).choice(len(vectors), queries, replace=False)] = True
+    return vectors[~held_out], vectors[held_out]
+
+
+def sweep_m(corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, m: int, efs: list[int],
+            ef_construction: int, k: int) -> list[dict]:
+    import hnswlib
+
+    started = time.perf_counter()
+    index = hnswlib.Index(space="cosine", dim=corpus.shape[1])
+    index.init_index(max_elements=len(corpus), ef_construction=ef_construction, M=m)
+    index.add_items(corpus, np.arange(len(corpus)))
+    build_s = time.perf_counter() - started
+    graph_mb = index.index_file_size() / 2**20
+    index.set_num_threads(1)
+
+    rows = []
+    for ef in efs:
+        index.set_ef(ef)
+        index.knn_query(queries[:1], k=k)  # warm
+        latencies, hits = [], 0
+        for query, expected in zip(queries, truth):
+            started = time.perf_counter()
+            labels, _ = index.knn_query(query[None, :], k=k)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            hits += len(set(labels[0].tolist()) & set(expected.tolist()))
+        latencies.sort()
+        rows.append({
+            "m": m,
+            "ef": ef,
+            "recall": hits / truth.size,
+            "p50": statistics.median(latencies),
+            "p99": latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+            "build_s": build_s,
+            "graph_mb": graph_mb,
+        })
+        print(
+            f"{m:>4} {ef:>6} {rows[-1]['recall']:>9.4f} {rows[-1]['p50']:>8.3f} {rows[-1]['p99']:>8.3f} "
+            f"{build_s:>8.1f} {graph_mb:>9.1f}",
+            flush=True,
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot", type=Path, default=None, help="local snapshot directory to take vectors from")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--spectrum-decay", type=float, default=1.0)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=40, help="the Retriever asks for 2 * top_k")
+    parser.add_argument("--m", type=int, nargs="+", default=[16, 32])
+    parser.add_argument("--ef", type=int, nargs="+", default=[10, 16, 32, 64, 128, 256])
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--target", type=float, nargs="+", default=[0.9, 0.95, 0.99])
+    args = parser.parse_args()
+
+    if args.snapshot is not None:
+        corpus, queries = snapshot_embeddings(args.snapshot, args.queries)
+    else:
+        corpus, queries = synthetic_embeddings(args.rows, args.queries, args.dim, args.clusters, args.spectrum_decay)
+    corpus = np.ascontiguousarray(corpus, dtype=np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    truth = exact_top_k(corpus, queries, args.k)
+    print(f"{len(corpus)} x {corpus.shape[1]} vectors, {len(queries)} queries, recall@{args.k} vs brute force")
+    print(f"{'M':>4} {'ef':>6} {'recall':>9} {'p50 ms':>8} {'p99 ms':>8} {'build s':>8} {'graph MB':>9}")
+
+    results = []
+    for m in args.m:
+        results.extend(sweep_m(corpus, queries, truth, m, args.ef, args.ef_construction, args.k))
+
+    print("cheapest setting per recall target (by p99):")
+    for target in args.target:
+        reaching = [r for r in results if r["recall"] >= target]
+        if not reaching:
+            print(f"  recall >= {target}: not reached, try larger --ef / --m")
+            continue
+        best = min(reaching, key=lambda r: r["p99"])
+        print(f"  recall >= {target}: M={best['m']} ef_search={best['ef']} "
+              f"(recall {best['recall']:.4f}, p50 {best['p50']:.3f}ms, p99 {best['p99']:.3f}ms)")
+
+
+if __name__ == "__main__":
+    main()
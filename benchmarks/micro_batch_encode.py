@@ -0,0 +1,116 @@
+"""Throughput / tail latency of per-request encodes vs. MicroBatchEncoder.
+
+Usage:
+    python -m benchmarks.micro_batch_encode                  # real bge model
+    python -m benchmarks.micro_batch_encode --synthetic      # no torch needed
+    python -m benchmarks.micro_batch_encode --concurrency 32 --window-ms 2 --max-batch 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.services.search.micro_batch import MicroBatchEncoder
+
+QUERIES = [
+    "funny story",
+    "working at Meta",
+    "good writing tips",
+    "biggest regrets in life",
+    "how did you get your first job",
+    "advice for new managers",
+    "what is your morning routine",
+    "leaving big tech to start a company",
+]
+
+
+class SyntheticEncoder:
+    """Mimics a CPU transformer: fixed per-call overhead plus per-item cost.
+
+    Only one forward pass runs at a time, like torch sharing its intra-op
+    thread pool between callers.
+    """
+
+    def __init__(self, call_ms: float = 12.0, item_ms: float = 1.5, dim: int = 768):
+        self.call = call_ms / 1000.0
+        self.item = item_ms / 1000.0
+        self.dim = dim
+        self._lock = threading.Lock()
+
+    def encode(self, texts):
+        batch = [texts] if isinstance(texts, str) else list(texts)
+        with self._lock:
+            time.sleep(self.call + self.item * len(batch))
+        out = np.random.rand(len(batch), self.dim).astype(np.float32)
+        return out[0] if isinstance(texts, str) else out
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _drive(encode_one, concurrency: int, total: int) -> dict[str, float]:
+    latencies: list[float] = []
+
+    def one(i: int) -> None:
+        started = time.perf_counter()
+        encode_one(QUERIES[i % len(QUERIES)] + f" #{i}")
+        latencies.append((time.perf_counter() - started) * 1000.0)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+    return {
+        "qps": total / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", action="store_true", help="use a sleep-based stand-in encoder")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--window-ms", type=float, default=3.0)
+    parser.add_argument("--max-batch", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        encoder = SyntheticEncoder()
+    else:
+        from FlagEmbedding import FlagModel
+
+        from app.services.retrieval import Retriever
+
+        encoder = FlagModel(Retriever.EMBEDDING_MODEL, use_fp16=False)
+        encoder.encode(QUERIES)  # warm up
+
+    print(f"{'mode':<12} {'conc':>5} {'qps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for concurrency in args.concurrency:
+        baseline = _drive(encoder.encode, concurrency, args.requests)
+        batcher = MicroBatchEncoder(encoder.encode, window_ms=args.window_ms, max_batch=args.max_batch)
+        try:
+            batched = _drive(batcher.encode, concurrency, args.requests)
+        finally:
+            batcher.close()
+        for mode, row in (("per-request", baseline), ("micro-batch", batched)):
+            print(
+                f"{mode:<12} {concurrency:>5} {row['qps']:>9.1f} {row['p50_ms']:>9.1f} "
+                f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}"
+            )
+        print(f"{'':<12} {'':>5} batches={batcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
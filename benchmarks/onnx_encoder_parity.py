@@ -0,0 +1,110 @@
+"""Parity, latency and RSS of the torch (fp32) vs ONNX (int8) query encoders.
+
+Export the ONNX model first:
+    python -m app.services.search.onnx_encoder export --out models/bge-base-en-v1.5-int8
+
+Then:
+    python -m benchmarks.onnx_encoder_parity --onnx-dir models/bge-base-en-v1.5-int8
+
+Each backend is timed in its own subprocess so peak RSS is not shared.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from app.services.search.onnx_encoder import OnnxQueryEncoder
+
+MODEL = "BAAI/bge-base-en-v1.5"
+QUERIES = [
+    "funny story",
+    "working at Meta",
+    "good writing tips",
+    "biggest regrets in life",
+    "how did you get your first engineering job",
+    "what advice would you give to a new manager",
+    "what's your morning routine",
+    "leaving big tech to start a company",
+    "dealing with burnout",
+    "how do you hire senior engineers",
+    "the hardest technical problem you solved",
+    "what books changed how you think",
+]
+
+
+def _load(backend: str, onnx_dir: str, quantized: bool):
+    if backend == "onnx":
+        return OnnxQueryEncoder(onnx_dir, quantized=quantized)
+    from FlagEmbedding import FlagModel
+
+    return FlagModel(MODEL, use_fp16=False)
+
+
+def _worker(backend: str, onnx_dir: str, quantized: bool, rounds: int) -> None:
+    encoder = _load(backend, onnx_dir, quantized)
+    for q in QUERIES[:3]:
+        encoder.encode(q)
+    latencies = []
+    for _ in range(rounds):
+        for q in QUERIES:
+            started = time.perf_counter()
+            encoder.encode(q)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+    latencies.sort()
+    print(json.dumps({
+        "backend": backend,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--onnx-dir", default="models/bge-base-en-v1.5-int8")
+    parser.add_argument("--fp32-onnx", action="store_true", help="use the unquantized ONNX model")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--worker", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    quantized = not args.fp32_onnx
+
+    if args.worker:
+        _worker(args.worker, args.onnx_dir, quantized, args.rounds)
+        return
+
+    # parity on the fixed query set
+    reference = np.asarray(_load("torch", args.onnx_dir, quantized).encode(QUERIES), dtype=np.float32)
+    candidate = _load("onnx", args.onnx_dir, quantized).encode(QUERIES)
+    cosines = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    print(f"cosine(torch, onnx): min={cosines.min():.4f} mean={cosines.mean():.4f}")
+    for q, c in sorted(zip(QUERIES, cosines), key=lambda pair: pair[1])[:3]:
+        print(f"  lowest  {c:.4f}  {q!r}")
+
+    print(f"\n{'backend':<8} {'p50 ms':>8} {'p99 ms':>8} {'max RSS MB':>11}")
+    for backend in ("torch", "onnx"):
+        cmd = [sys.executable, "-m", "benchmarks.onnx_encoder_parity", "--worker", backend,
+               "--onnx-dir", args.onnx_dir, "--rounds", str(args.rounds)]
+        if args.fp32_onnx:
+            cmd.append("--fp32-onnx")
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout.strip().splitlines()[-1]
+        row = json.loads(out)
+        print(f"{row['backend']:<8} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['max_rss_mb']:>11.0f}")
+
+    if cosines.min() < args.min_cosine:
+        sys.exit(f"❌ parity check failed: min cosine {cosines.min():.4f} < {args.min_cosine}")
+    print("✅ parity check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Filtered search still finds deduplicated QA pairs through any of their postings.
+
+Indexes a handful of QA pairs shared between episodes (same podcast and
+across podcasts) the way step 6 does, then queries them with podcast, date
+and duration filters through the Retriever's vector leg, on an in-memory
+Chroma collection and on a local exact snapshot built from it. Every
+filter must return the pair from the posting that satisfies it, and no
+pair whose postings all fall outside it.
+
+    python -m benchmarks.qa_filter_check
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from app.services.indexing.chroma_indexer import ChromaIndexer
+from app.services.retrieval import Retriever
+from app.services.search.filters import SearchFilters
+from app.services.search.local_index import LocalVectorIndex, export_and_build
+
+DIM = 16
+
+
+def _episode(episode_id, podcast_id, published, duration, qas):
+    return {
+        "id": episode_id,
+        "podcast_id": podcast_id,
+        "date_published": published,
+        "duration": duration,
+        "questions": [{"start": 10.0 * i, "end": 10.0 * i + 5} for i in range(len(qas))],
+        "question_answers": [{"question": q, "answer": a} for q, a in qas],
+    }
+
+
+EPISODES = [
+    _episode("e1", "p1", datetime(2023, 1, 10), 1800, [("How did you start?", "By accident.")]),
+    _episode("e2", "p2", datetime(2023, 3, 1), 3600, [("How did you start?", "By accident.")]),
+    _episode("e3", "p1", datetime(2024, 6, 1), 5400, [
+        ("What is your morning routine?", "Coffee and a walk."),
+        ("How did you start?", "By accident."),
+    ]),
+    _episode("e4", "p1", datetime(2023, 2, 1), 2400, [("What is your morning routine?", "Coffee and a walk.")]),
+]
+
+# (filters, question) -> expected episode_id, or None when the pair must not come back
+CASES = [
+    ({"podcast_ids": ["p2"]}, "How did you start?", "e2"),
+    ({"podcast_ids": ["p1"]}, "How did you start?", "e1"),
+    ({"podcast_ids": ["p1"], "published_after": "2024-01-01"}, "How did you start?", "e3"),
+    ({"published_after": "2023-02-15", "published_before": "2023-12-31"}, "How did you start?", "e2"),
+    # p1's vector spans 2023-01..2024-06 but has no posting in between
+    ({"podcast_ids": ["p1"], "published_after": "2023-02-15", "published_before": "2023-12-31"},
+     "How did you start?", None),
+    ({"min_duration": 3000, "max_duration": 6000, "podcast_ids": ["p1"]}, "How did you start?", "e3"),
+    ({"max_duration": 2000}, "How did you start?", "e1"),
+    ({"max_duration": 2000}, "What is your morning routine?", None),
+    ({"min_duration": 2000, "max_duration": 3000}, "What is your morning routine?", "e4"),
+]
+
+
+def build_docs() -> list[dict]:
+    indexer = object.__new__(ChromaIndexer)
+    groups = indexer.merge_near_duplicates(indexer.dedupe_qa_pairs(EPISODES))
+    rng = np.random.default_rng(0)
+    question_vectors = {}
+    docs = []
+    for doc_id, group in groups.items():
+        vector = question_vectors.setdefault(group["question"], rng.standard_normal(DIM))
+        docs.append({
+            "id": doc_id,
+            "document": json.dumps({"question": group["question"], "answer": group["answer"]}),
+            "metadata": indexer.qa_metadata(group),
+            # vectors of the same question differ a little, like two podcasts' copies would
+            "embedding": (vector + 0.01 * rng.standard_normal(DIM)).tolist(),
+        })
+    return docs, question_vectors
+
+
+def run_cases(retriever: Retriever, collection, question_vectors: dict, label: str) -> int:
+    failures = 0
+    for raw, question, expected in CASES:
+        filters = SearchFilters(**raw)
+        results = retriever._query_vectors(
+            collection, "qa", [question_vectors[question].tolist()], top_k=10, filters=filters)
+        hits = [
+            m["episode_id"] for m, doc in zip(results["metadatas"][0], results["documents"][0])
+            if json.loads(doc)["question"] == question
+        ] if results["ids"] else []
+        ok = hits[:1] == ([expected] if expected else [])
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {label:<6} {question!r:<34} {raw} -> {hits or 'no hit'} (expected {expected})")
+    return failures
+
+
+def main() -> None:
+    docs, question_vectors = build_docs()
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection("episode_qa_pairs", configuration={"hnsw": {"space": "cosine"}})
+    collection.add(
+        ids=[d["id"] for d in docs],
+        embeddings=[d["embedding"] for d in docs],
+        documents=[d["document"] for d in docs],
+        metadatas=[d["metadata"] for d in docs],
+    )
+    print(f"{len(docs)} QA vectors from {sum(len(e['question_answers']) for e in EPISODES)} occurrences")
+
+    retriever = object.__new__(Retriever)
+    retriever.chroma_client = client
+    failures = run_cases(retriever, collection, question_vectors, "chroma")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_and_build(collection, Path(tmp))
+        retriever.chroma_client = None
+        local = LocalVectorIndex(Path(tmp) / collection.name, mode="exact")
+        failures += run_cases(retriever, local, question_vectors, "local")
+
+    if failures:
+        sys.exit(f"❌ {failures} filtered QA lookups failed")
+    print("✅ every filter found its posting")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Recall and latency of the vector backends on a synthetic corpus.
+
+Loads the same synthetic, bge-sized vectors into a Chroma collection
+(configured like ChromaIndexer, ef_search=10) and into a local snapshot
+exported from it, then compares recall@k against exact float32 search,
+per-query latency and index memory for the HNSW, exact and binary local
+modes, optionally on PCA/truncated snapshots as well (recall is always
+measured against the full-dimension ground truth).
+
+    python -m benchmarks.vector_backends --rows 50000 --ef 10 32 64 128
+    python -m benchmarks.vector_backends --rows 3000    # QA-sized
+    python -m benchmarks.vector_backends --rows 1000000 --skip-chroma --oversample 10 20
+    python -m benchmarks.vector_backends --skip-chroma --reduce pca:128 pca:256 truncate:256
+    python -m benchmarks.vector_backends --chroma-host localhost --chroma-port 8000   # real server
+
+Chroma defaults to an in-process PersistentClient, which leaves out its
+HTTP round trip, so its numbers are a lower bound.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services.search import local_index
+from app.services.search.local_index import LocalVectorIndex, export_and_build, normalize_rows
+
+
+def synthetic_embeddings(rows: int, queries: int, dim: int, clusters: int, decay: float, seed: int = 0):
+    """Clustered corpus + queries with a power-law spectrum in a random basis.
+
+    Real sentence embeddings concentrate their variance in a few hundred
+    directions; ``decay`` sets how fast (per-dimension std ~ i^(-decay/2),
+    0 = isotropic, the worst case for PCA and sign quantisation).
+    """
+
+    rng = np.random.default_rng(seed)
+    std = (1.0 + np.arange(dim)) ** (-decay / 2)
+    rotation, _ = np.linalg.qr(rng.standard_normal((dim, dim)))
+    centres = rng.standard_normal((clusters, dim)) * std
+    labels = rng.integers(0, clusters, rows + queries)
+    points = centres[labels] + 0.5 * rng.standard_normal((rows + queries, dim)) * std
+    points = normalize_rows(points @ rotation.T)
+    return points[:rows], points[rows:]
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> list[set[str]]:
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [{f"row-{i}" for i in row} for row in top]
+
+
+def recall(truth: list[set[str]], ids: list[list[str]]) -> float:
+    return sum(len(t & set(found)) for t, found in zip(truth, ids)) / sum(len(t) for t in truth)
+
+
+def measure(name: str, backend, queries: np.ndarray, truth: list[set[str]], k: int) -> None:
+    backend.query(query_embeddings=queries[:1], n_results=k)  # warm
+    latencies, ids = [], []
+    for q in queries:
+        started = time.perf_counter()
+        res = backend.query(query_embeddings=q[None, :], n_results=k)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        ids.append(res["ids"][0])
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+    print(f"{name:<28} recall@{k}={recall(truth, ids):.4f}  p50={statistics.median(latencies):7.3f}ms  p99={p99:7.3f}ms")
+
+
+class ArrayCollection:
+    """Just enough of a Chroma collection for export_collection(); skips Chroma entirely."""
+
+    name = "bench_vectors"
+
+    def __init__(self, corpus: np.ndarray):
+        self.corpus = corpus
+
+    def count(self) -> int:
+        return len(self.corpus)
+
+    def get(self, limit, offset, include=None):
+        rows = range(offset, min(offset + limit, len(self.corpus)))
+        return {
+            "ids": [f"row-{i}" for i in rows],
+            "embeddings": self.corpus[offset:offset + limit],
+            "documents": [f"document {i}" for i in rows],
+            "metadatas": [{"episode_id": str(i // 50)} for i in rows],
+        }
+
+
+def memory_report(snapshot: Path, rows: int) -> None:
+    size = lambda name: (snapshot / name).stat().st_size  # noqa: E731
+    print(f"index memory for {rows} rows (bytes/vector in brackets):")
+    for label, nbytes, where in (
+        ("hnsw graph + float32 vectors", size(local_index.HNSW_FILE), "RAM"),
+        ("exact float32 matrix", 2 * size(local_index.EMBEDDINGS_FILE), "RAM"),
+        ("exact int8 matrix + scales", size(local_index.INT8_FILE) + size(local_index.INT8_SCALE_FILE), "page cache"),
+        ("binary sign bits", size(local_index.BITS_FILE), "RAM"),
+        ("float16 rescoring store", size(local_index.EMBEDDINGS_FILE), "mmap, touched rows only"),
+    ):
+        print(f"  {label:<30} {nbytes / 2**20:9.1f} MiB  [{nbytes / rows:6.0f}]  {where}")
+
+
+def load_chroma(args, corpus: np.ndarray, workdir: Path):
+    import chromadb
+
+    if args.chroma_host:
+        client = chromadb.HttpClient(host=args.chroma_host, port=args.chroma_port)
+    else:
+        client = chromadb.PersistentClient(path=str(workdir / "chroma"))
+    name = "bench_vectors"
+    try:
+        client.delete_collection(name)
+    except Exception:
+        pass
+    collection = client.create_collection(
+        name=name,
+        configuration={"hnsw": {"space": "cosine", "ef_construction": 200, "ef_search": 10}},
+    )
+    for start in range(0, len(corpus), 5000):
+        block = corpus[start:start + 5000]
+        collection.add(
+            ids=[f"row-{i}" for i in range(start, start + len(block))],
+            embeddings=block.tolist(),
+            documents=[f"document {i}" for i in range(start, start + len(block))],
+            metadatas=[{"episode_id": str(i // 50)} for i in range(start, start + len(block))],
+        )
+    return collection
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--spectrum-decay", type=float, default=1.0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=40, help="the Retriever asks for 2 * top_k")
+    parser.add_argument("--ef", type=int, nargs="+", default=[10, 32, 64, 128])
+    parser.add_argument("--oversample", type=int, nargs="+", default=[10])
+    parser.add_argument("--reduce", nargs="*", default=[], help="also build reduced snapshots, e.g. pca:256 truncate:256")
+    parser.add_argument("--skip-chroma", action="store_true", help="export straight from memory; for large --rows")
+    parser.add_argument("--chroma-host", default=None)
+    parser.add_argument("--chroma-port", type=int, default=8000)
+    args = parser.parse_args()
+
+    corpus, queries = synthetic_embeddings(args.rows, args.queries, args.dim, args.clusters, args.spectrum_decay)
+    truth = exact_top_k(corpus, queries, args.k)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        if args.skip_chroma:
+            collection = ArrayCollection(corpus)
+        else:
+            started = time.perf_counter()
+            collection = load_chroma(args, corpus, workdir)
+            print(f"chroma load: {time.perf_counter() - started:.1f}s for {args.rows} x {args.dim}")
+            measure("chroma (ef_search=10)", collection, queries, truth, args.k)
+
+        for reduce in [None, *args.reduce]:
+            print(f"--- local snapshot, {reduce or 'full dimension'} ---")
+            out = workdir / (reduce or "full").replace(":", "-")
+            started = time.perf_counter()
+            manifest = export_and_build(collection, out, reduce=reduce)
+            print(f"export + build: {time.perf_counter() - started:.1f}s, transform={manifest.get('transform')}")
+            snapshot = out / collection.name
+            for ef in args.ef:
+                measure(f"local hnsw (ef={ef})", LocalVectorIndex(snapshot, ef=ef), queries, truth, args.k)
+            for dtype in ("float32", "float16", "int8"):
+                index = LocalVectorIndex(snapshot, mode="exact", dtype=dtype)
+                measure(f"local exact ({dtype})", index, queries, truth, args.k)
+            for oversample in args.oversample:
+                index = LocalVectorIndex(snapshot, mode="binary", oversample=oversample)
+                measure(f"local binary (x{oversample})", index, queries, truth, args.k)
+            memory_report(snapshot, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -42,8 +42,7 @@ def es_search():
 def hybrid_search():
     retriever = Retriever()
     
-    for q in queries:
-        results = retriever.hybrid_search(q)
+    for q, results in zip(queries, retriever.batch_hybrid_search(queries)):
         file_id = q[:30]
         file_path = "search_results/hybrid_search_results/hybrid_"+str(file_id)+".json"
         dump = {